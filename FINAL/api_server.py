@@ -6,13 +6,17 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+
 import pandas as pd
 import time
 import json
+import threading
+from collections import OrderedDict
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 
 # Import our RAG system components
+import utils
 from query_parser import QueryParser
 from lexical_search import BM25Retriever
 from semantic_search import SemanticSearch
@@ -25,32 +29,133 @@ from rag_ui_bridge import RAGUIBridge
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
+# Faster response encoding when orjson is installed
+if utils.orjson is not None:
+    from flask.json.provider import DefaultJSONProvider
+    
+    class OrjsonProvider(DefaultJSONProvider):
+        """Flask JSON provider that encodes and decodes with orjson"""
+        def dumps(self, obj, **kwargs):
+            return utils.orjson.dumps(
+                obj, default=self.default,
+                option=utils.orjson.OPT_SERIALIZE_NUMPY | utils.orjson.OPT_NON_STR_KEYS
+            ).decode()
+        
+        def loads(self, s, **kwargs):
+            return utils.parse_json(s)
+    
+    app.json = OrjsonProvider(app)
+
 # Initialize the RAG system
 rag_bridge = RAGUIBridge("sample_funds.csv", model_name="mistral:latest")
 
 # Global flag for showing explanations
 show_explanation = True
 
+class ResultCache:
+    """Thread-safe LRU cache whose entries expire ttl seconds after being stored"""
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        """Return the live value for key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    def put(self, key, value):
+        """Store value for key, evicting the least recently used entry when full"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+def llm_failed(llm_response: str) -> bool:
+    """Whether an LLM response is one of the error messages OllamaClient/RAGUIBridge return"""
+    return llm_response.startswith("Error")
+
+# Number of distinct (query, top_k) pipeline results kept in memory, and
+# how long one is reused before the pipeline runs again
+SEARCH_CACHE_SIZE = 512
+SEARCH_CACHE_TTL = 1800  # seconds
+
+search_cache = ResultCache(SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL)
+
+def cached_process_query(query: str, top_k: int) -> Dict[str, Any]:
+    """Run the RAG pipeline for a query, reusing results for repeated queries"""
+    results = search_cache.get((query, top_k))
+    if results is None:
+        results = rag_bridge.process_query(query, top_k=top_k)
+        # Don't keep serving an Ollama outage for this query once it recovers
+        if not llm_failed(results.get("llm_response", "")):
+            search_cache.put((query, top_k), results)
+    return results
+
+# Longest query (after whitespace normalization) sent through the pipeline
+MAX_QUERY_LENGTH = 1000
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace so trivially different queries share a cache entry"""
+    return " ".join(query.split())
+
+# Display labels for numeric risk scores (4 and above are "Very High")
+RISK_SCORE_LABELS = {1: "Low", 2: "Moderate", 3: "High"}
+
 def map_risk_score_to_text(risk_score: int) -> str:
     """Convert numeric risk score to text representation"""
     if isinstance(risk_score, str):
         return risk_score
     
-    if risk_score == 1:
-        return "Low"
-    elif risk_score == 2:
-        return "Moderate"
-    elif risk_score == 3:
-        return "High"
-    elif risk_score >= 4:
-        return "Very High"
-    else:
-        return "Unknown"
+    label = RISK_SCORE_LABELS.get(risk_score)
+    if label is not None:
+        return label
+    
+    return "Very High" if risk_score >= 4 else "Unknown"
+
+# (UI key, fund field) pairs for the returns and score breakdown on each card
+RETURN_FIELDS = (
+    ("oneYear", "returns_1yr"),
+    ("threeYear", "returns_3yr"),
+    ("fiveYear", "returns_5yr")
+)
+SCORE_FIELDS = (
+    ("semantic", "semantic_score"),
+    ("metadata", "bm25_score"),
+    ("fuzzy", "fuzzy_name_score"),
+    ("final", "combined_score")
+)
+
+def make_fund_id(fund_name: str) -> str:
+    """Short fund ID used by the UI, derived from the fund name"""
+    return str(hash(fund_name))[:8]
+
+def build_fund_id_lookup(fund_data: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    """Map UI fund IDs to fund records (first fund wins on a collision)"""
+    lookup = {}
+    for fund in fund_data.to_dict('records'):
+        lookup.setdefault(make_fund_id(fund.get('fund_name', '')), fund)
+    return lookup
+
+def numeric_or_zero(value):
+    """Return value if it is a number, otherwise 0"""
+    return value if isinstance(value, (int, float)) else 0
 
 def fund_to_ui_format(fund: Dict[str, Any], include_scores: bool = True) -> Dict[str, Any]:
     """Convert fund data from RAG system format to UI format"""
     # Generate a deterministic ID based on fund name
-    fund_id = str(hash(fund.get('fund_name', '')))[:8]
+    fund_id = make_fund_id(fund.get('fund_name', ''))
     
     # Map the fund data to the UI format
     ui_fund = {
@@ -62,29 +167,21 @@ def fund_to_ui_format(fund: Dict[str, Any], include_scores: bool = True) -> Dict
         "aum": fund.get('aum', '10M'),  # Default AUM
         "risk": map_risk_score_to_text(fund.get('risk_score', 'Unknown')),
         "description": fund.get('description', 'No description available.'),
-        "returns": {
-            "oneYear": fund.get('returns_1yr', fund.get('returns_1yr', 0)) if isinstance(fund.get('returns_1yr', 0), (int, float)) else 0,
-            "threeYear": fund.get('returns_3yr', fund.get('returns_3yr', 0)) if isinstance(fund.get('returns_3yr', 0), (int, float)) else 0,
-            "fiveYear": fund.get('returns_5yr', fund.get('returns_5yr', 0)) if isinstance(fund.get('returns_5yr', 0), (int, float)) else 0,
-        },
+        "returns": {ui_key: numeric_or_zero(fund.get(field, 0)) for ui_key, field in RETURN_FIELDS},
     }
 
     # Add scores if requested
     if include_scores and show_explanation:
-        semantic_score = fund.get('semantic_score', 0)
-        bm25_score = fund.get('bm25_score', 0)
-        fuzzy_name_score = fund.get('fuzzy_name_score', 0)
-        combined_score = fund.get('combined_score', 0)
-        
         ui_fund["scoreExplanation"] = {
-            "semantic": f"{semantic_score:.2f}" if isinstance(semantic_score, (int, float)) else "0.00",
-            "metadata": f"{bm25_score:.2f}" if isinstance(bm25_score, (int, float)) else "0.00",
-            "fuzzy": f"{fuzzy_name_score:.2f}" if isinstance(fuzzy_name_score, (int, float)) else "0.00",
-            "final": f"{combined_score:.2f}" if isinstance(combined_score, (int, float)) else "0.00"
+            ui_key: f"{numeric_or_zero(fund.get(field, 0)):.2f}" for ui_key, field in SCORE_FIELDS
         }
     
     return ui_fund
 
+# Words that open a strengths or weaknesses section in an LLM analysis
+STRENGTH_KEYWORDS = ("strength", "advantage", "pro")
+WEAKNESS_KEYWORDS = ("weakness", "drawback", "con")
+
 def get_fund_analysis(fund: Dict[str, Any], llm_response: str) -> Dict[str, Any]:
     """Generate fund analysis data based on the fund and LLM response"""
     # Extract strengths and weaknesses from LLM response (simple heuristic approach)
@@ -97,10 +194,11 @@ def get_fund_analysis(fund: Dict[str, Any], llm_response: str) -> Dict[str, Any]
     
     for line in lines:
         line = line.strip()
-        if "strength" in line.lower() or "advantage" in line.lower() or "pro" in line.lower():
+        lowered = line.lower()
+        if any(keyword in lowered for keyword in STRENGTH_KEYWORDS):
             current_section = "strengths"
             continue
-        elif "weakness" in line.lower() or "drawback" in line.lower() or "con" in line.lower():
+        elif any(keyword in lowered for keyword in WEAKNESS_KEYWORDS):
             current_section = "weaknesses"
             continue
         elif line.startswith('-') or line.startswith('•'):
@@ -110,8 +208,8 @@ def get_fund_analysis(fund: Dict[str, Any], llm_response: str) -> Dict[str, Any]
                 weaknesses.append(line[1:].strip())
     
     # If we couldn't extract strengths/weaknesses, create some based on fund data
+    risk = map_risk_score_to_text(fund.get('risk_score', 'Unknown'))
     if not strengths:
-        risk = map_risk_score_to_text(fund.get('risk_score', 'Unknown'))
         returns_3yr = fund.get('returns_3yr', 0)
         
         if risk == "Low":
@@ -124,7 +222,6 @@ def get_fund_analysis(fund: Dict[str, Any], llm_response: str) -> Dict[str, Any]
         strengths.append("Professional fund management")
     
     if not weaknesses:
-        risk = map_risk_score_to_text(fund.get('risk_score', 'Unknown'))
         expense_ratio = fund.get('expense_ratio', 0)
         
         if risk == "High":
@@ -191,6 +288,36 @@ def get_fund_analysis(fund: Dict[str, Any], llm_response: str) -> Dict[str, Any]
     
     return {"analysis": analysis}
 
+# Fund records by UI fund ID, built once rather than scanning the table per request
+funds_by_id = build_fund_id_lookup(rag_bridge.fund_data)
+
+# Number of per-fund analyses kept in memory, and how long one is reused
+ANALYSIS_CACHE_SIZE = 256
+ANALYSIS_CACHE_TTL = 1800  # seconds
+
+analysis_cache = ResultCache(ANALYSIS_CACHE_SIZE, ANALYSIS_CACHE_TTL)
+
+def cached_fund_analysis(fund_id: str) -> Dict[str, Any]:
+    """Generate the LLM analysis for a known fund ID once and reuse it"""
+    analysis = analysis_cache.get(fund_id)
+    if analysis is not None:
+        return analysis
+    
+    found_fund = funds_by_id[fund_id]
+    
+    # Generate a query about this specific fund
+    query = f"Analyze the {found_fund.get('fund_name')} fund"
+    
+    # The fund is already known, so prompt the LLM with it directly
+    # instead of running the full retrieval pipeline
+    llm_response = rag_bridge.generate_fund_response(query, found_fund)
+    
+    analysis = get_fund_analysis(found_fund, llm_response)
+    # A failed LLM call yields heuristic strengths/weaknesses; retry it next time
+    if not llm_failed(llm_response):
+        analysis_cache.put(fund_id, analysis)
+    return analysis
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -223,16 +350,24 @@ def search():
     filters = data.get('filters', {})
     top_k = int(data.get('top_k', 10))
     
-    if not query:
+    # Reject blank and oversized queries before they reach retrieval and the LLM
+    normalized_query = normalize_query(query)
+    if not normalized_query:
         return jsonify({
             "success": False,
             "error": "Query is required",
             "results": []
         })
+    if len(normalized_query) > MAX_QUERY_LENGTH:
+        return jsonify({
+            "success": False,
+            "error": f"Query is too long (maximum {MAX_QUERY_LENGTH} characters)",
+            "results": []
+        })
     
     # Process the query through the RAG system
     try:
-        results = rag_bridge.process_query(query, top_k=top_k)
+        results = cached_process_query(normalized_query, top_k)
         
         # Apply additional filters from the UI if provided
         filtered_results = results["ranked_funds"]
@@ -271,16 +406,8 @@ def analyze():
         })
     
     try:
-        # For demo purposes, we'll use the search functionality to find the fund
-        # In a real system, you would have a database lookup
-        all_funds = rag_bridge.fund_data.to_dict('records')
-        
         # Find the fund by ID (which we're generating from the fund name hash)
-        found_fund = None
-        for fund in all_funds:
-            if str(hash(fund.get('fund_name', '')))[:8] == fund_id:
-                found_fund = fund
-                break
+        found_fund = funds_by_id.get(fund_id)
                 
         if not found_fund:
             return jsonify({
@@ -288,20 +415,10 @@ def analyze():
                 "error": "Fund not found"
             })
         
-        # Generate a query about this specific fund
-        query = f"Analyze the {found_fund.get('fund_name')} fund"
-        
-        # Use the RAG system to generate an analysis
-        results = rag_bridge.process_query(query, top_k=1)
-        llm_response = results.get("llm_response", "")
-        
-        # Generate detailed analysis
-        analysis = get_fund_analysis(found_fund, llm_response)
-        
         return jsonify({
             "success": True,
             "fund": fund_to_ui_format(found_fund),
-            **analysis
+            **cached_fund_analysis(fund_id)
         })
         
     except Exception as e:
@@ -313,4 +430,7 @@ def analyze():
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port, debug=True) 
\ No newline at end of file
+    # Debug mode runs the reloader, which loads the RAG system a second time
+    # in a child process; only enable it for development
+    debug = os.environ.get('FLASK_DEBUG') == '1'
+    app.run(host='0.0.0.0', port=port, debug=debug, threaded=True) 
\ No newline at end of file
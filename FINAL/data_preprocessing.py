@@ -1,5 +1,4 @@
 import os
-import json
 import pandas as pd
 import numpy as np
 from tqdm import tqdm
@@ -23,18 +22,15 @@ def load_data():
     paths = utils.get_data_paths()
     
     print("Loading mutual funds data...")
-    with open(paths["mf_data"], 'r') as f:
-        mf_data = json.load(f)
+    mf_data = utils.load_json(paths["mf_data"])
     mf_df = pd.DataFrame(mf_data)
     
     print("Loading stock data...")
-    with open(paths["stock_data"], 'r') as f:
-        stock_data = json.load(f)
+    stock_data = utils.load_json(paths["stock_data"])
     stock_df = pd.DataFrame(stock_data)
     
     print("Loading holdings data...")
-    with open(paths["holdings_data"], 'r') as f:
-        holdings_data = json.load(f)
+    holdings_data = utils.load_json(paths["holdings_data"])
     holdings_df = pd.DataFrame(holdings_data)
     
     print("Loading query data...")
@@ -95,8 +91,7 @@ def create_fund_holdings_map(mf_df, holdings_df, stock_df):
     # Create a lookup for stock names
     stock_id_to_name = {}
     if 'stock_id' in stock_df.columns and 'company_name' in stock_df.columns:
-        for _, row in stock_df.iterrows():
-            stock_id_to_name[row['stock_id']] = row['company_name']
+        stock_id_to_name = dict(zip(stock_df['stock_id'], stock_df['company_name']))
     
     # Group holdings by fund_id
     for fund_id, group in tqdm(holdings_df.groupby('fund_id'), desc="Processing funds"):
@@ -105,10 +100,7 @@ def create_fund_holdings_map(mf_df, holdings_df, stock_df):
         
         # Get top N holdings (or all if fewer)
         top_holdings = []
-        for _, holding in sorted_holdings.iterrows():
-            stock_id = holding['stock_id']
-            percentage = holding['percentage']
-            
+        for stock_id, percentage in zip(sorted_holdings['stock_id'], sorted_holdings['percentage']):
             company_name = stock_id_to_name.get(stock_id, stock_id)
             top_holdings.append((stock_id, percentage, company_name))
         
@@ -127,17 +119,13 @@ def create_fund_sector_map(holdings_df, stock_df):
     # Create a lookup for stock sectors
     stock_id_to_sector = {}
     if 'stock_id' in stock_df.columns and 'sector' in stock_df.columns:
-        for _, row in stock_df.iterrows():
-            stock_id_to_sector[row['stock_id']] = row['sector']
+        stock_id_to_sector = dict(zip(stock_df['stock_id'], stock_df['sector']))
     
     # Group holdings by fund_id
     for fund_id, group in tqdm(holdings_df.groupby('fund_id'), desc="Processing sectors"):
         sectors = {}
         
-        for _, holding in group.iterrows():
-            stock_id = holding['stock_id']
-            percentage = holding['percentage']
-            
+        for stock_id, percentage in zip(group['stock_id'], group['percentage']):
             sector = stock_id_to_sector.get(stock_id, 'Unknown')
             sectors[sector] = sectors.get(sector, 0) + percentage
         
@@ -152,7 +140,8 @@ def generate_fund_descriptions(mf_df, fund_holdings, fund_sectors):
     print("Generating fund descriptions...")
     descriptions = []
     
-    for _, fund in tqdm(mf_df.iterrows(), total=len(mf_df), desc="Creating descriptions"):
+    # Plain dict records avoid building a pandas Series per row (iterrows)
+    for fund in tqdm(mf_df.to_dict('records'), total=len(mf_df), desc="Creating descriptions"):
         # Basic fund info
         fund_id = fund.get('fund_id', '')
         fund_name = fund.get('fund_name', '')
@@ -249,7 +238,7 @@ def main():
     print("Saving processed data...")
     
     # Save fund descriptions
-    descriptions_df.to_csv(output_paths["fund_descriptions"], index=False)
+    utils.save_table(descriptions_df, output_paths["fund_descriptions"])
     print(f"Saved {len(descriptions_df)} fund descriptions to {output_paths['fund_descriptions']}")
     
     # Save fund corpus (one description per line)
@@ -259,9 +248,8 @@ def main():
     
     # Create a dictionary of enriched fund data
     enriched_funds = {}
-    for _, fund in mf_df.iterrows():
-        fund_id = fund["fund_id"]
-        fund_dict = fund.to_dict()
+    for fund_dict in mf_df.to_dict('records'):
+        fund_id = fund_dict["fund_id"]
         
         # Add holdings data
         if fund_id in fund_holdings:
@@ -284,8 +272,7 @@ def main():
     print(f"Saved enriched fund data to {output_paths['enriched_fund_data']}")
     
     # Save preprocessed funds as JSON
-    with open(output_paths["preprocessed_funds"], "w") as f:
-        json.dump(enriched_funds, f, indent=2)
+    utils.save_json(enriched_funds, output_paths["preprocessed_funds"], indent=True)
     print(f"Saved preprocessed funds to {output_paths['preprocessed_funds']}")
     
     print("Data preprocessing complete!")
@@ -1,17 +1,17 @@
 import os
 import numpy as np
-import pandas as pd
-import json
 import faiss
 import time
-from tqdm import tqdm
-from sentence_transformers import SentenceTransformer
 from rank_bm25 import BM25Okapi
 import utils
 
 # Configuration
 EMBEDDING_MODEL_NAME = "BAAI/bge-small-en-v1.5"  # Alternatively: "sentence-transformers/all-MiniLM-L6-v2"
 USE_BM25_FALLBACK = True  # Whether to create BM25 index as fallback
+EMBEDDING_BATCH_SIZE = 128  # Texts per encode batch
+IVF_MIN_VECTORS = 1000  # Below this, an exact flat index is used
+IVF_MAX_LISTS = 256  # Upper bound on IVF clusters
+IVF_NPROBE = 8  # Clusters scanned per query
 
 def load_data():
     """Load the preprocessed data"""
@@ -28,45 +28,53 @@ def load_data():
         descriptions = f.read().splitlines()
     
     # Load fund mapping
-    fund_df = pd.read_csv(output_paths["fund_descriptions"])
+    fund_df = utils.load_table(output_paths["fund_descriptions"])
+    if fund_df is None:
+        raise FileNotFoundError(f"Fund descriptions not found at {output_paths['fund_descriptions']}. "
+                               "Please run data_preprocessing.py first.")
     
     print(f"Loaded {len(descriptions)} fund descriptions")
     return descriptions, fund_df
 
-def load_or_create_embeddings(descriptions):
+def embedding_metadata(model):
+    """Model and backend variant the stored embeddings and FAISS index are built with"""
+    return {"model_name": EMBEDDING_MODEL_NAME, "embedding_backend": model.embedding_backend}
+
+def load_or_create_embeddings(descriptions, model=None):
     """Load existing embeddings or create new ones"""
+    if model is None:
+        print(f"Loading embedding model: {EMBEDDING_MODEL_NAME}")
+        model = utils.load_embedding_model(EMBEDDING_MODEL_NAME)
+    
     output_paths = utils.get_output_paths()
     embeddings_path = output_paths["fund_embeddings"]
+    meta_path = output_paths["embedding_meta"]
+    metadata = embedding_metadata(model)
     
-    # Check if embeddings already exist
+    # Check if embeddings already exist for this model and backend
     if os.path.exists(embeddings_path):
-        print(f"Loading existing embeddings from {embeddings_path}")
-        embeddings = np.load(embeddings_path)
-        return embeddings
-    
-    # Load model
-    print(f"Loading embedding model: {EMBEDDING_MODEL_NAME}")
-    model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+        if os.path.exists(meta_path) and utils.load_json(meta_path) == metadata:
+            print(f"Loading existing embeddings from {embeddings_path}")
+            embeddings = np.load(embeddings_path)
+            return embeddings
+        print(f"Existing embeddings were not built with {metadata}, regenerating")
     
     # Generate embeddings
     print(f"Generating embeddings for {len(descriptions)} descriptions")
     start_time = time.time()
     
-    # Batch process to save memory
-    batch_size = 32
-    embeddings = []
-    
-    for i in tqdm(range(0, len(descriptions), batch_size)):
-        batch = descriptions[i:i+batch_size]
-        batch_embeddings = model.encode(batch, show_progress_bar=False)
-        embeddings.append(batch_embeddings)
-    
-    # Combine batches
-    embeddings = np.vstack(embeddings)
+    # encode() already length-sorts its input into batches and restores the order
+    embeddings = model.encode(
+        descriptions,
+        batch_size=EMBEDDING_BATCH_SIZE,
+        show_progress_bar=True,
+        convert_to_numpy=True
+    )
     
     # Save embeddings
     os.makedirs(os.path.dirname(embeddings_path), exist_ok=True)
     np.save(embeddings_path, embeddings)
+    utils.save_json(metadata, meta_path)
     
     elapsed_time = time.time() - start_time
     print(f"Generated {len(embeddings)} embeddings in {elapsed_time:.2f} seconds")
@@ -88,10 +96,21 @@ def create_faiss_index(embeddings):
     faiss.normalize_L2(embeddings)
     
     # Create index (using inner product for cosine similarity)
-    index = faiss.IndexFlatIP(dimension)
-    
-    # Alternative: Use HNSW index for better performance
-    # index = faiss.IndexHNSWFlat(dimension, 32)  # 32 neighbors
+    num_vectors = embeddings.shape[0]
+    if num_vectors < IVF_MIN_VECTORS:
+        # Small corpus: exact search is already fast
+        index = faiss.IndexFlatIP(dimension)
+    else:
+        # Larger corpus: IVF with 8-bit scalar quantization (4x smaller vectors)
+        nlist = min(IVF_MAX_LISTS, num_vectors // 32)
+        quantizer = faiss.IndexFlatIP(dimension)
+        index = faiss.IndexIVFScalarQuantizer(
+            quantizer, dimension, nlist,
+            faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT
+        )
+        print(f"Training IVF-SQ8 index with {nlist} lists")
+        index.train(embeddings)
+        index.nprobe = IVF_NPROBE
     
     # Add vectors to index
     index.add(embeddings)
@@ -114,10 +133,11 @@ def create_bm25_index(descriptions):
     
     return bm25_index
 
-def test_search(index, embeddings, fund_df, descriptions, bm25_index=None):
+def test_search(index, embeddings, fund_df, descriptions, bm25_index=None, model=None):
     """Test the search functionality with a few queries"""
     # Load embedding model for queries
-    model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+    if model is None:
+        model = utils.load_embedding_model(EMBEDDING_MODEL_NAME)
     
     # Test queries
     test_queries = [
@@ -128,21 +148,21 @@ def test_search(index, embeddings, fund_df, descriptions, bm25_index=None):
         "sbi mutual fund with exposure to banking sector"
     ]
     
+    # Embed all queries in one batch
+    query_embeddings = model.encode(test_queries, convert_to_numpy=True)
+    query_embeddings = query_embeddings / np.linalg.norm(query_embeddings, axis=1, keepdims=True)
+    query_embeddings = np.ascontiguousarray(query_embeddings, dtype=np.float32)
+    
+    # Search in FAISS for all queries at once
+    k = 3  # top-k results
+    all_distances, all_indices = index.search(query_embeddings, k)
+    
     print("\n=== Testing Search ===")
-    for query in test_queries:
+    for query, distances, indices in zip(test_queries, all_distances, all_indices):
         print(f"\nQuery: {query}")
         
-        # Embed query
-        query_embedding = model.encode([query])[0]
-        query_embedding = query_embedding / np.linalg.norm(query_embedding)
-        query_embedding = np.array([query_embedding], dtype=np.float32)
-        
-        # Search in FAISS
-        k = 3  # top-k results
-        distances, indices = index.search(query_embedding, k)
-        
         print(f"Top {k} semantic search results:")
-        for i, (idx, distance) in enumerate(zip(indices[0], distances[0])):
+        for i, (idx, distance) in enumerate(zip(indices, distances)):
             fund_name = fund_df.iloc[idx]['fund_name'] if idx < len(fund_df) else "Unknown"
             print(f"{i+1}. {fund_name} (Score: {distance:.4f})")
             print(f"   {descriptions[idx][:150]}...")
@@ -151,7 +171,7 @@ def test_search(index, embeddings, fund_df, descriptions, bm25_index=None):
         if bm25_index is not None:
             tokenized_query = utils.clean_text(query).split()
             bm25_scores = bm25_index.get_scores(tokenized_query)
-            top_bm25 = np.argsort(bm25_scores)[-k:][::-1]
+            top_bm25 = utils.top_k_indices(bm25_scores, k)
             
             print(f"\nTop {k} keyword search results:")
             for i, idx in enumerate(top_bm25):
@@ -163,8 +183,12 @@ def main():
     # Load preprocessed data
     descriptions, fund_df = load_data()
     
+    # Load model
+    print(f"Loading embedding model: {EMBEDDING_MODEL_NAME}")
+    model = utils.load_embedding_model(EMBEDDING_MODEL_NAME)
+    
     # Generate or load embeddings
-    embeddings = load_or_create_embeddings(descriptions)
+    embeddings = load_or_create_embeddings(descriptions, model)
     
     # Create FAISS index
     index = create_faiss_index(embeddings)
@@ -176,15 +200,14 @@ def main():
     
     # Create and save fund_id_to_index mapping
     output_paths = utils.get_output_paths()
-    fund_id_to_index = {row['fund_id']: str(i) for i, row in fund_df.iterrows()}
+    fund_id_to_index = {fund_id: str(i) for i, fund_id in zip(fund_df.index, fund_df['fund_id'])}
     
     # Save the mapping
-    with open(output_paths["fund_id_to_index"], 'w') as f:
-        json.dump(fund_id_to_index, f)
+    utils.save_json(fund_id_to_index, output_paths["fund_id_to_index"])
     print(f"Saved fund_id_to_index mapping to {output_paths['fund_id_to_index']}")
     
     # Test search
-    test_search(index, embeddings, fund_df, descriptions, bm25_index)
+    test_search(index, embeddings, fund_df, descriptions, bm25_index, model)
     
     print("\nEmbedding and indexing complete!")
     print("You can now use search_engine.py to perform searches.")
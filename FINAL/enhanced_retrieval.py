@@ -3,7 +3,7 @@ import json
 import numpy as np
 import pandas as pd
 import logging
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
 from rank_bm25 import BM25Okapi
 import utils
 
@@ -11,6 +11,17 @@ import utils
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+def format_number(value):
+    """Format a numeric fund value to two decimals, or return None if it isn't numeric"""
+    # Fast path for values that are already numbers
+    if type(value) is float or type(value) is int:
+        return f"{value:.2f}"
+    
+    try:
+        return f"{float(value):.2f}"
+    except (ValueError, TypeError):
+        return None
+
 class EnhancedRetrieval:
     """
     Enhanced retrieval system that combines semantic search with metadata filtering
@@ -41,6 +52,11 @@ class EnhancedRetrieval:
             'expense_ratio': 0.8  # Lower weight for expense ratio match
         }
         
+        # BM25 index over the fund corpus, built on first use and reused
+        # for as long as the same corpus is passed in
+        self.bm25_index = None
+        self.bm25_corpus = None
+        
         logger.info("Enhanced Retrieval initialized with weights: %s", self.weights)
     
     def compute_metadata_match_score(self, fund_data, filters):
@@ -139,27 +155,50 @@ class EnhancedRetrieval:
         Returns:
             float: Fuzzy match score (0.0 to 1.0)
         """
-        # Clean query
+        return self.compute_fuzzy_match_scores([fund_data], query)[0]
+    
+    def compute_fuzzy_match_scores(self, funds, query):
+        """
+        Compute fuzzy match scores for many funds against one query.
+        
+        Each fuzzy field is scored for all funds in a single rapidfuzz cdist
+        call, using the token set ratio averaged over the fields present.
+        
+        Args:
+            funds (list): Fund data dictionaries
+            query (str): Original query string
+            
+        Returns:
+            list: Fuzzy match score (0.0 to 1.0) for each fund
+        """
         clean_query = utils.clean_text(query)
         
-        # Initialize scores for each field
-        field_scores = {}
+        score_sums = np.zeros(len(funds))
+        field_counts = np.zeros(len(funds))
         
         for field in self.fuzzy_fields:
-            if field in fund_data and isinstance(fund_data[field], str):
-                field_value = utils.clean_text(fund_data[field])
-                
-                # Calculate token set ratio (handles word order and partial matches well)
-                ratio = fuzz.token_set_ratio(clean_query, field_value) / 100.0
-                
-                # Store score
-                field_scores[field] = ratio
+            positions = []
+            field_values = []
+            for i, fund_data in enumerate(funds):
+                if field in fund_data and isinstance(fund_data[field], str):
+                    positions.append(i)
+                    field_values.append(utils.clean_text(fund_data[field]))
+            
+            if not positions:
+                continue
+            
+            # Token set ratio for the query against every value of this field
+            ratios = process.cdist(
+                [clean_query], field_values,
+                scorer=fuzz.token_set_ratio, dtype=np.float64
+            )[0] / 100.0
+            
+            score_sums[positions] += ratios
+            field_counts[positions] += 1
         
-        # Return average of all field scores, or 0 if no fields matched
-        if field_scores:
-            return sum(field_scores.values()) / len(field_scores)
-        else:
-            return 0.0
+        # Average of matched field scores, or 0 if no fields matched
+        scores = np.divide(score_sums, field_counts, out=np.zeros(len(funds)), where=field_counts > 0)
+        return scores.tolist()
     
     def compute_final_scores(self, results, query, filters):
         """
@@ -176,7 +215,12 @@ class EnhancedRetrieval:
         """
         logger.info("Computing enhanced scores for %d results", len(results))
         
-        for result in results:
+        # Fuzzy scores for all results in one batch
+        fuzzy_scores = self.compute_fuzzy_match_scores(
+            [result['fund_data'] for result in results], query
+        )
+        
+        for result, fuzzy_score in zip(results, fuzzy_scores):
             # Extract fund data
             fund_data = result['fund_data']
             
@@ -186,9 +230,6 @@ class EnhancedRetrieval:
             # Compute metadata match score
             metadata_score = self.compute_metadata_match_score(fund_data, filters)
             
-            # Compute fuzzy match score
-            fuzzy_score = self.compute_fuzzy_match_score(fund_data, query)
-            
             # Compute final weighted score
             final_score = (
                 self.weights['semantic'] * semantic_score +
@@ -234,18 +275,19 @@ class EnhancedRetrieval:
         # Get current fund IDs
         current_fund_ids = set(r['fund_id'] for r in results)
         
-        # Tokenize corpus and query
-        tokenized_corpus = [utils.clean_text(doc).split() for doc in corpus]
-        tokenized_query = utils.clean_text(query).split()
-        
-        # Create BM25 index
-        bm25 = BM25Okapi(tokenized_corpus)
+        # Create BM25 index once per corpus
+        if self.bm25_index is None or self.bm25_corpus is not corpus:
+            tokenized_corpus = [utils.clean_text(doc).split() for doc in corpus]
+            self.bm25_index = BM25Okapi(tokenized_corpus)
+            self.bm25_corpus = corpus
+            logger.info("Built BM25 index over %d documents", len(tokenized_corpus))
         
-        # Get BM25 scores
-        bm25_scores = bm25.get_scores(tokenized_query)
+        # Tokenize query and get BM25 scores
+        tokenized_query = utils.clean_text(query).split()
+        bm25_scores = self.bm25_index.get_scores(tokenized_query)
         
         # Get top BM25 results
-        top_bm25_indices = np.argsort(bm25_scores)[-top_k*2:][::-1]  # Get more than we need
+        top_bm25_indices = utils.top_k_indices(bm25_scores, top_k*2)  # Get more than we need
         
         # Add new results from BM25 (only ones not already in results)
         new_results = []
@@ -326,9 +368,10 @@ Which one is the best match? Explain why in 3 sentences.
                 for period in ['1yr', '3yr', '5yr']:
                     key = f'return_{period}'
                     if key in fund_data and fund_data[key] is not None:
-                        try:
-                            returns_info.append(f"{period}: {float(fund_data[key]):.2f}%")
-                        except (ValueError, TypeError):
+                        formatted = format_number(fund_data[key])
+                        if formatted is not None:
+                            returns_info.append(f"{period}: {formatted}%")
+                        else:
                             logger.warning(f"Invalid return value for {key}: {fund_data[key]}")
                             returns_info.append(f"{period}: N/A")
                 
@@ -337,9 +380,10 @@ Which one is the best match? Explain why in 3 sentences.
                 
                 # Add expense ratio if available
                 if 'expense_ratio' in fund_data and fund_data['expense_ratio'] is not None:
-                    try:
-                        fund_context += f"- Expense Ratio: {float(fund_data['expense_ratio']):.2f}%\n"
-                    except (ValueError, TypeError):
+                    formatted = format_number(fund_data['expense_ratio'])
+                    if formatted is not None:
+                        fund_context += f"- Expense Ratio: {formatted}%\n"
+                    else:
                         logger.warning(f"Invalid expense ratio: {fund_data['expense_ratio']}")
                         fund_context += f"- Expense Ratio: N/A\n"
                     
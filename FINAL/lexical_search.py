@@ -1,14 +1,22 @@
+import pickle
+from functools import lru_cache
 import numpy as np
 import pandas as pd
 from rank_bm25 import BM25Okapi
 from nltk.tokenize import word_tokenize
 import nltk
+import utils
 
 try:
     nltk.data.find('tokenizers/punkt')
 except LookupError:
     nltk.download('punkt')
 
+@lru_cache(maxsize=4096)
+def tokenize_query(query):
+    """Lowercase and tokenize a query for BM25 (cached; returns a tuple)"""
+    return tuple(word_tokenize(query.lower()))
+
 class BM25Retriever:
     def __init__(self, fund_data):
         """
@@ -21,12 +29,73 @@ class BM25Retriever:
         self.fund_data = fund_data
         self.corpus = self.fund_data['description'].tolist()
         
+        # Row dicts built once; iloc[idx].to_dict() per hit is slow
+        self.records = self.fund_data.to_dict('records')
+        
         # Tokenize each document in corpus
-        tokenized_corpus = [word_tokenize(doc.lower()) for doc in self.corpus]
+        tokenized_corpus = self._load_or_tokenize_corpus()
         
         # Create BM25 model
         self.bm25 = BM25Okapi(tokenized_corpus)
         
+        # Per-term postings: the documents containing each term and the
+        # term's precomputed BM25 contribution to each of them
+        self.postings = self._build_postings()
+        
+    def _load_or_tokenize_corpus(self):
+        """Tokenize the corpus, reusing tokens saved for the same corpus"""
+        cache_path = utils.PROCESSED_DIR / f"bm25_tokens_{utils.corpus_digest(self.corpus)}.pkl"
+        
+        if cache_path.exists():
+            try:
+                with open(cache_path, "rb") as f:
+                    tokenized_corpus = pickle.load(f)
+            except (OSError, EOFError, pickle.UnpicklingError) as e:
+                print(f"Ignoring unreadable BM25 token cache {cache_path}: {e}")
+                tokenized_corpus = None
+            if tokenized_corpus is not None and len(tokenized_corpus) == len(self.corpus):
+                utils.touch_cache(cache_path)
+                return tokenized_corpus
+        
+        tokenized_corpus = [word_tokenize(doc.lower()) for doc in self.corpus]
+        utils.write_atomic(
+            cache_path,
+            lambda f: pickle.dump(tokenized_corpus, f, protocol=pickle.HIGHEST_PROTOCOL)
+        )
+        utils.remove_unused_caches("bm25_tokens_*.pkl")
+        return tokenized_corpus
+    
+    def _build_postings(self):
+        """Precompute term -> (doc indices, BM25 weights) from the fitted model"""
+        bm25 = self.bm25
+        doc_ids = {}
+        freqs = {}
+        for doc_id, doc_freqs in enumerate(bm25.doc_freqs):
+            for term, freq in doc_freqs.items():
+                doc_ids.setdefault(term, []).append(doc_id)
+                freqs.setdefault(term, []).append(freq)
+        
+        doc_len = np.asarray(bm25.doc_len, dtype=np.float64)
+        length_norm = bm25.k1 * (1 - bm25.b + bm25.b * doc_len / bm25.avgdl)
+        
+        postings = {}
+        for term, ids in doc_ids.items():
+            ids = np.asarray(ids, dtype=np.int64)
+            tf = np.asarray(freqs[term], dtype=np.float64)
+            weights = bm25.idf[term] * (tf * (bm25.k1 + 1) / (tf + length_norm[ids]))
+            postings[term] = (ids, weights)
+        return postings
+    
+    def get_scores(self, tokenized_query):
+        """BM25 score of every document, equal to BM25Okapi.get_scores"""
+        scores = np.zeros(len(self.records))
+        for term in tokenized_query:
+            posting = self.postings.get(term)
+            if posting is not None:
+                ids, weights = posting
+                scores[ids] += weights
+        return scores
+        
     def retrieve(self, query, top_k=100):
         """
         Retrieve top k funds matching the query using BM25
@@ -39,18 +108,18 @@ class BM25Retriever:
             list of dictionaries with fund details and relevance scores
         """
         # Tokenize query
-        tokenized_query = word_tokenize(query.lower())
+        tokenized_query = tokenize_query(query)
         
         # Get BM25 scores
-        bm25_scores = self.bm25.get_scores(tokenized_query)
+        bm25_scores = self.get_scores(tokenized_query)
         
-        # Get indices of top k scores
-        top_indices = np.argsort(bm25_scores)[::-1][:top_k]
+        # Get indices of top k scores, partitioning first so only k are sorted
+        top_indices = utils.top_k_indices(bm25_scores, top_k)
         
-        # Return fund details with scores
+        # Return fund details with scores (copied, callers add fields)
         results = []
         for idx in top_indices:
-            fund_details = self.fund_data.iloc[idx].to_dict()
+            fund_details = dict(self.records[idx])
             fund_details['bm25_score'] = bm25_scores[idx]
             results.append(fund_details)
         
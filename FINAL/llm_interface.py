@@ -214,10 +214,8 @@ User query: {user_query} [/INST]"""
             return "Model not loaded. Please download the model file.", 0.0
         
         # Build a profile description
-        profile_str = "Investor profile: "
-        for key, value in user_profile.items():
-            profile_str += f"{key}: {value}, "
-        profile_str = profile_str.rstrip(", ")
+        profile_items = ", ".join(f"{key}: {value}" for key, value in user_profile.items())
+        profile_str = f"Investor profile: {profile_items}".rstrip(", ")
         
         # Create recommendation query
         recommendation_query = f"Based on this {profile_str}, recommend the most suitable mutual funds from the options provided. "
@@ -39,6 +39,9 @@ class MetadataFilter:
         """
         if not risk_filters:
             return funds
+        
+        # Resolve each requested risk level once rather than once per fund
+        targets = [(risk.lower(), self.risk_mapping.get(risk.lower(), 0)) for risk in risk_filters]
             
         filtered_funds = []
         for fund in funds:
@@ -47,18 +50,18 @@ class MetadataFilter:
                 continue
                 
             fund_risk = fund['risk_score']
+            if isinstance(fund_risk, str):
+                fund_risk = fund_risk.lower()
             
             # Check if numeric risk score matches any requested risk level
-            for risk in risk_filters:
-                target_risk = self.risk_mapping.get(risk.lower(), 0)
-                
+            for risk, target_risk in targets:
                 # Allow for some flexibility in matching
                 if isinstance(fund_risk, (int, float)) and abs(fund_risk - target_risk) <= 1:
                     filtered_funds.append(fund)
                     break
                     
                 # Handle text risk levels
-                elif isinstance(fund_risk, str) and risk.lower() in fund_risk.lower():
+                elif isinstance(fund_risk, str) and risk in fund_risk:
                     filtered_funds.append(fund)
                     break
         
@@ -81,20 +84,21 @@ class MetadataFilter:
         # Normalize sector names
         normalized_sectors = [self.normalize_sector(s) for s in sector_filters]
         
+        # Skip funds that have neither a sector nor a category
+        candidates = [fund for fund in funds if 'sector' in fund or 'category' in fund]
+        
         filtered_funds = []
-        for fund in funds:
-            # Skip if fund doesn't have sector
-            if 'sector' not in fund and 'category' not in fund:
-                continue
-                
-            # Check both sector and category fields
-            fund_sector = fund.get('sector', '').lower()
-            fund_category = fund.get('category', '').lower()
-            
+        if candidates:
+            # Check both sector and category fields for all candidates at once:
+            # one vectorized substring test per requested sector
+            fund_sectors = np.array([str(fund.get('sector', '')).lower() for fund in candidates])
+            fund_categories = np.array([str(fund.get('category', '')).lower() for fund in candidates])
+            matched = np.zeros(len(candidates), dtype=bool)
             for sector in normalized_sectors:
-                if (sector in fund_sector) or (sector in fund_category):
-                    filtered_funds.append(fund)
-                    break
+                matched |= np.char.find(fund_sectors, sector) >= 0
+                matched |= np.char.find(fund_categories, sector) >= 0
+            
+            filtered_funds = [fund for fund, keep in zip(candidates, matched.tolist()) if keep]
         
         return filtered_funds if filtered_funds else funds  # Return original list if all filtered out
     
@@ -200,21 +204,29 @@ class MetadataFilter:
         if not keywords:
             return funds
             
-        query_text = " ".join(keywords).lower()
+        words = " ".join(keywords).lower().split()
+        if not words:
+            for fund in funds:
+                fund['fuzzy_name_score'] = 0
+            return funds
         
+        named_funds = [fund for fund in funds if 'fund_name' in fund]
         for fund in funds:
             if 'fund_name' not in fund:
                 fund['fuzzy_name_score'] = 0
-                continue
-                
-            fund_name = fund['fund_name'].lower()
-            
-            # Simple word overlap score
-            words = query_text.split()
-            matching_words = sum(1 for word in words if word in fund_name)
-            score = matching_words / len(words) if words else 0
+        
+        if named_funds:
+            # Simple word overlap score, computed for all names at once:
+            # one vectorized substring test per query word instead of a
+            # Python loop per (fund, word) pair
+            fund_names = np.array([fund['fund_name'].lower() for fund in named_funds])
+            matching_words = np.zeros(len(fund_names))
+            for word in words:
+                matching_words += np.char.find(fund_names, word) >= 0
+            scores = matching_words / len(words)
             
-            fund['fuzzy_name_score'] = score
+            for fund, score in zip(named_funds, scores.tolist()):
+                fund['fuzzy_name_score'] = score
         
         return funds
 
@@ -1,6 +1,6 @@
 import requests
-import json
 import time
+from utils import parse_json
 
 class OllamaClient:
     def __init__(self, model_name="mistral", base_url="http://localhost:11434"):
@@ -15,15 +15,18 @@ class OllamaClient:
         self.base_url = base_url
         self.api_url = f"{base_url}/api"
         
+        # Reuse one keep-alive connection pool for every call to Ollama
+        self.session = requests.Session()
+        
         # Check if model is available
         self.is_available = self._check_model_available()
         
     def _check_model_available(self):
         """Check if the specified model is available in Ollama"""
         try:
-            response = requests.get(f"{self.api_url}/tags")
+            response = self.session.get(f"{self.api_url}/tags")
             if response.status_code == 200:
-                models = response.json().get("models", [])
+                models = parse_json(response.content).get("models", [])
                 return any(model.get("name") == self.model_name for model in models)
             return False
         except Exception as e:
@@ -65,21 +68,21 @@ class OllamaClient:
         try:
             if not stream:
                 # Non-streaming response
-                response = requests.post(url, json=payload)
+                response = self.session.post(url, json=payload)
                 if response.status_code == 200:
-                    return response.json().get("response", "")
+                    return parse_json(response.content).get("response", "")
                 else:
                     return f"Error: {response.status_code} - {response.text}"
             else:
                 # Streaming response
-                response = requests.post(url, json=payload, stream=True)
+                response = self.session.post(url, json=payload, stream=True)
                 
                 if response.status_code == 200:
                     # Return generator for streaming
                     def response_generator():
                         for line in response.iter_lines():
                             if line:
-                                chunk = json.loads(line)
+                                chunk = parse_json(line)
                                 yield chunk.get("response", "")
                                 
                                 # Break if done
@@ -124,22 +127,22 @@ class OllamaClient:
         try:
             if not stream:
                 # Non-streaming response
-                response = requests.post(url, json=payload)
+                response = self.session.post(url, json=payload)
                 if response.status_code == 200:
-                    result = response.json()
+                    result = parse_json(response.content)
                     return result.get("message", {}).get("content", "")
                 else:
                     return f"Error: {response.status_code} - {response.text}"
             else:
                 # Streaming response
-                response = requests.post(url, json=payload, stream=True)
+                response = self.session.post(url, json=payload, stream=True)
                 
                 if response.status_code == 200:
                     # Return generator for streaming
                     def response_generator():
                         for line in response.iter_lines():
                             if line:
-                                chunk = json.loads(line)
+                                chunk = parse_json(line)
                                 message = chunk.get("message", {})
                                 yield message.get("content", "")
                                 
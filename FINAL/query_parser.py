@@ -10,6 +10,22 @@ except LookupError:
     nltk.download('punkt')
     nltk.download('stopwords')
 
+# Numeric attribute filters such as "expense ratio < 1%" or "returns above 10 percent",
+# compiled once into a single alternation so a query is scanned in one pass
+ATTRIBUTE_FILTER_PATTERN = re.compile(
+    r"(?P<attribute>expense ratio|returns)\s*"
+    r"(?P<operator><|>|<=|>=|less than|more than|below|above)\s*"
+    r"(?P<value>[\d.]+)(%|percent)?"
+)
+
+# Text operators normalized to their symbolic form
+TEXT_OPERATORS = {
+    "less than": "<",
+    "below": "<",
+    "more than": ">",
+    "above": ">"
+}
+
 class QueryParser:
     def __init__(self):
         # Define known sectors for mutual funds
@@ -68,40 +84,17 @@ class QueryParser:
             if risk in query:
                 filters["risk"].append(risk)
                 
-        # Extract specific value filters like "expense ratio < 1%"
-        expense_ratio_pattern = r"expense ratio\s*(<|>|<=|>=|less than|more than|below|above)\s*([\d.]+)(%|percent)?"
-        match = re.search(expense_ratio_pattern, query)
-        if match:
-            operator = match.group(1)
-            value = float(match.group(2))
+        # Extract value filters like "expense ratio < 1%" or "returns > 10%"
+        # in a single scan; the first match for each attribute wins
+        for match in ATTRIBUTE_FILTER_PATTERN.finditer(query):
+            attribute = match.group("attribute").replace(" ", "_")
+            if attribute in filters["other_attributes"]:
+                continue
             
-            # Convert text operators to symbols
-            if operator in ["less than", "below"]:
-                operator = "<"
-            elif operator in ["more than", "above"]:
-                operator = ">"
-                
-            filters["other_attributes"]["expense_ratio"] = {
-                "operator": operator,
-                "value": value
-            }
-            
-        # Extract returns filter like "returns > 10%"
-        returns_pattern = r"returns\s*(<|>|<=|>=|less than|more than|below|above)\s*([\d.]+)(%|percent)?"
-        match = re.search(returns_pattern, query)
-        if match:
-            operator = match.group(1)
-            value = float(match.group(2))
-            
-            # Convert text operators to symbols
-            if operator in ["less than", "below"]:
-                operator = "<"
-            elif operator in ["more than", "above"]:
-                operator = ">"
-                
-            filters["other_attributes"]["returns"] = {
-                "operator": operator,
-                "value": value
+            operator = match.group("operator")
+            filters["other_attributes"][attribute] = {
+                "operator": TEXT_OPERATORS.get(operator, operator),
+                "value": float(match.group("value"))
             }
         
         return filters
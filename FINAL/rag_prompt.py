@@ -1,4 +1,22 @@
 import json
+from collections import ChainMap
+
+# Prompt block for one fund, formatted with format_map
+FUND_PROMPT_TEMPLATE = (
+    "Fund #{rank}: {fund_name}\n"
+    "Type: {fund_type}\n"
+    "Risk Level: {risk_score}\n"
+    "Expense Ratio: {expense_ratio}\n"
+    "{returns}\n"
+    "{description_line}"
+)
+
+# Fallback values for fields missing from a fund
+FUND_PROMPT_DEFAULTS = {
+    'fund_name': 'Unknown Fund',
+    'risk_score': 'N/A',
+    'expense_ratio': 'N/A'
+}
 
 class RAGPromptGenerator:
     def __init__(self):
@@ -30,12 +48,6 @@ If none of these funds match my criteria well, please say so and explain why."""
         Returns:
             formatted string with fund details
         """
-        # Extract key fund details
-        fund_name = fund.get('fund_name', 'Unknown Fund')
-        fund_type = fund.get('category', fund.get('fund_type', 'N/A'))
-        risk_score = fund.get('risk_score', 'N/A')
-        expense_ratio = fund.get('expense_ratio', 'N/A')
-        
         # Extract returns data - check common field patterns
         returns_data = []
         for key, value in fund.items():
@@ -45,24 +57,19 @@ If none of these funds match my criteria well, please say so and explain why."""
                 else:
                     returns_data.append(f"{key}: {value}")
         
-        returns_str = ", ".join(returns_data) if returns_data else "Returns: N/A"
-        
         # Format detailed description
         description = fund.get('description', '')
         if not description and 'summary' in fund:
             description = fund['summary']
         
-        # Format the fund data
-        fund_str = f"Fund #{rank}: {fund_name}\n"
-        fund_str += f"Type: {fund_type}\n"
-        fund_str += f"Risk Level: {risk_score}\n"
-        fund_str += f"Expense Ratio: {expense_ratio}\n"
-        fund_str += f"{returns_str}\n"
-        
-        if description:
-            fund_str += f"Description: {description}\n"
-            
-        return fund_str
+        # Computed fields take precedence over the fund's own keys
+        fields = {
+            'rank': rank,
+            'fund_type': fund.get('category', fund.get('fund_type', 'N/A')),
+            'returns': ", ".join(returns_data) if returns_data else "Returns: N/A",
+            'description_line': f"Description: {description}\n" if description else ""
+        }
+        return FUND_PROMPT_TEMPLATE.format_map(ChainMap(fields, fund, FUND_PROMPT_DEFAULTS))
     
     def generate_prompt(self, query, ranked_funds, top_k=5):
         """
@@ -77,9 +84,10 @@ If none of these funds match my criteria well, please say so and explain why."""
             dict with system and user prompts ready for LLM
         """
         # Format context with top funds
-        fund_context = ""
-        for i, fund in enumerate(ranked_funds[:top_k], 1):
-            fund_context += self.format_fund_data(fund, i) + "\n"
+        fund_context = "".join(
+            self.format_fund_data(fund, i) + "\n"
+            for i, fund in enumerate(ranked_funds[:top_k], 1)
+        )
             
         # Fill templates
         user_prompt = self.user_template.format(
@@ -2,6 +2,8 @@ import pandas as pd
 import json
 import time
 import os
+from collections import ChainMap
+from concurrent.futures import ThreadPoolExecutor
 
 from query_parser import QueryParser
 from lexical_search import BM25Retriever
@@ -10,6 +12,27 @@ from metadata_filter import MetadataFilter
 from score_fusion import ScoreFusion
 from rag_prompt import RAGPromptGenerator
 from ollama_client import OllamaClient
+import utils
+
+# Fund card markup, formatted once per fund with format_map
+FUND_CARD_TEMPLATE = (
+    "<div class='fund-card'>"
+    "<h4>{rank}. {fund_name}</h4>"
+    "<p><strong>Category:</strong> {category}</p>"
+    "<p><strong>Risk:</strong> {risk_score}</p>"
+    "<p><strong>Expense Ratio:</strong> {expense_ratio}</p>"
+    "{returns_html}"
+    "{score_html}"
+    "</div>"
+)
+
+# Fallback values for fields missing from a fund
+FUND_CARD_DEFAULTS = {
+    'fund_name': 'Unknown Fund',
+    'category': 'N/A',
+    'risk_score': 'N/A',
+    'expense_ratio': 'N/A'
+}
 
 class RAGUIBridge:
     def __init__(self, fund_data_path, model_name="mistral:latest"):
@@ -34,6 +57,10 @@ class RAGUIBridge:
         self.prompt_generator = RAGPromptGenerator()
         self.llm_client = OllamaClient(model_name=model_name)
         
+        # Runs semantic search alongside BM25 retrieval; both spend most of
+        # their time in numpy/model code that releases the GIL
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        
         print("RAG system initialized and ready!")
         
     def _load_fund_data(self, data_path):
@@ -61,7 +88,7 @@ class RAGUIBridge:
         
         # Load actual data
         try:
-            df = pd.read_csv(data_path)
+            df = utils.read_csv(data_path)
             print(f"Loaded {len(df)} funds.")
             return df
         except Exception as e:
@@ -69,6 +96,13 @@ class RAGUIBridge:
             # Return empty DataFrame
             return pd.DataFrame()
     
+    @staticmethod
+    def _timed(func, *args, **kwargs):
+        """Call func and return (result, elapsed seconds)"""
+        start = time.time()
+        result = func(*args, **kwargs)
+        return result, time.time() - start
+    
     def process_query(self, query, top_k=5, explain=True):
         """
         Process a user query through the entire RAG pipeline
@@ -95,21 +129,26 @@ class RAGUIBridge:
             "output": f"Normalized: '{query_info['normalized_query']}' with {len(query_info['filters']['sector'])} sector filters, {len(query_info['filters']['risk'])} risk filters"
         })
         
+        # Step 3 runs in the background while step 2 runs here
+        semantic_future = self.executor.submit(
+            self._timed, self.semantic_search.search, query_info["normalized_query"], top_k=10
+        )
+        
         # Step 2: BM25 retrieval
-        step_start = time.time()
-        bm25_results = self.bm25_retriever.search_keywords(query_info["keywords"], top_k=100)
+        bm25_results, bm25_time = self._timed(
+            self.bm25_retriever.search_keywords, query_info["keywords"], top_k=100
+        )
         steps_info.append({
             "step": "BM25 Retrieval",
-            "time": time.time() - step_start,
+            "time": bm25_time,
             "output": f"Retrieved {len(bm25_results)} candidates with keyword matching"
         })
         
         # Step 3: Semantic search
-        step_start = time.time()
-        semantic_results = self.semantic_search.search(query_info["normalized_query"], top_k=10)
+        semantic_results, semantic_time = semantic_future.result()
         steps_info.append({
             "step": "Semantic Search",
-            "time": time.time() - step_start,
+            "time": semantic_time,
             "output": f"Retrieved {len(semantic_results)} candidates with semantic matching"
         })
         
@@ -183,6 +222,22 @@ class RAGUIBridge:
         
         return results
     
+    def generate_fund_response(self, query, fund):
+        """
+        Answer a query about one known fund without running retrieval
+        
+        Args:
+            query: user's natural language query
+            fund: dict with the fund's details
+            
+        Returns:
+            LLM response text
+        """
+        prompt_data = self.prompt_generator.generate_prompt(query, [fund], top_k=1)
+        if self.llm_client.is_available:
+            return self.llm_client.process_rag_prompt(prompt_data)
+        return "Error: LLM model not available. Please ensure Ollama is running with the mistral model."
+    
     def generate_result_html(self, results):
         """
         Generate HTML display of results for UI
@@ -193,57 +248,46 @@ class RAGUIBridge:
         Returns:
             HTML string for display
         """
-        html = "<div class='rag-results'>"
+        # Collect fragments and join once at the end
+        parts = ["<div class='rag-results'>"]
         
         # Add LLM response
-        html += f"<div class='llm-response'>{results['llm_response']}</div>"
+        parts.append(f"<div class='llm-response'>{results['llm_response']}</div>")
         
         # Add top funds
-        html += "<div class='top-funds'>"
-        html += "<h3>Top Matching Funds</h3>"
-        html += "<div class='funds-container'>"
+        parts.append("<div class='top-funds'>")
+        parts.append("<h3>Top Matching Funds</h3>")
+        parts.append("<div class='funds-container'>")
         
         for i, fund in enumerate(results.get("ranked_funds", []), 1):
-            html += f"<div class='fund-card'>"
-            html += f"<h4>{i}. {fund.get('fund_name', 'Unknown Fund')}</h4>"
-            html += f"<p><strong>Category:</strong> {fund.get('category', 'N/A')}</p>"
-            html += f"<p><strong>Risk:</strong> {fund.get('risk_score', 'N/A')}</p>"
-            html += f"<p><strong>Expense Ratio:</strong> {fund.get('expense_ratio', 'N/A')}</p>"
-            
             # Add returns
-            returns_keys = [key for key in fund.keys() if 'return' in key.lower()]
-            if returns_keys:
-                html += "<p><strong>Returns:</strong> "
-                returns_items = []
-                for key in returns_keys:
-                    returns_items.append(f"{key}: {fund[key]}")
-                html += ", ".join(returns_items)
-                html += "</p>"
-                
+            returns_items = [f"{key}: {value}" for key, value in fund.items() if 'return' in key.lower()]
+            returns_html = f"<p><strong>Returns:</strong> {', '.join(returns_items)}</p>" if returns_items else ""
+            
             # Add scores if available
+            score_html = ""
             if 'combined_score' in fund:
-                html += f"<p><strong>Match Score:</strong> {fund['combined_score']:.2f}</p>"
-                
-            html += "</div>"
+                score_html = f"<p><strong>Match Score:</strong> {fund['combined_score']:.2f}</p>"
+            
+            card_fields = {'rank': i, 'returns_html': returns_html, 'score_html': score_html}
+            parts.append(FUND_CARD_TEMPLATE.format_map(ChainMap(card_fields, fund, FUND_CARD_DEFAULTS)))
         
-        html += "</div></div>"
+        parts.append("</div></div>")
         
         # Add explanation if available
         if "explanation" in results:
-            html += "<div class='explanation'>"
-            html += "<h3>How Results Were Generated</h3>"
+            parts.append("<div class='explanation'>")
+            parts.append("<h3>How Results Were Generated</h3>")
             
             for step in results["explanation"]:
-                html += f"<div class='step'>"
-                html += f"<strong>{step['step']}</strong> ({step['time']:.2f}s): {step['output']}"
-                html += f"</div>"
+                parts.append(f"<div class='step'><strong>{step['step']}</strong> ({step['time']:.2f}s): {step['output']}</div>")
                 
-            html += f"<p><strong>Total time:</strong> {results['timing']['total_time']:.2f}s</p>"
-            html += "</div>"
+            parts.append(f"<p><strong>Total time:</strong> {results['timing']['total_time']:.2f}s</p>")
+            parts.append("</div>")
             
-        html += "</div>"
+        parts.append("</div>")
         
-        return html
+        return "".join(parts)
 
 # Example usage
 if __name__ == "__main__":
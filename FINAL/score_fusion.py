@@ -30,22 +30,20 @@ class ScoreFusion:
             return funds
             
         # Extract scores
-        scores = [fund.get(score_field, 0) for fund in funds]
+        scores = np.array([fund.get(score_field, 0) for fund in funds], dtype=np.float64)
+        min_score = scores.min()
+        score_range = scores.max() - min_score
         
-        # Check if all scores are the same
-        if max(scores) == min(scores):
-            for fund in funds:
-                fund[f"norm_{score_field}"] = 1.0 if fund.get(score_field, 0) > 0 else 0.0
-            return funds
-            
-        # Normalize to [0,1]
-        min_score = min(scores)
-        score_range = max(scores) - min_score
-        
-        for fund in funds:
-            original_score = fund.get(score_field, 0)
-            normalized_score = (original_score - min_score) / score_range if score_range > 0 else 0
-            fund[f"norm_{score_field}"] = normalized_score
+        if score_range > 0:
+            # Normalize to [0,1]
+            normalized = (scores - min_score) / score_range
+        else:
+            # All scores are the same
+            normalized = (scores > 0).astype(np.float64)
+        
+        norm_field = f"norm_{score_field}"
+        for fund, normalized_score in zip(funds, normalized.tolist()):
+            fund[norm_field] = normalized_score
             
         return funds
     
@@ -59,25 +57,25 @@ class ScoreFusion:
         Returns:
             funds with added combined_score field, sorted by combined_score
         """
-        for fund in funds:
-            # Get normalized scores, default to 0 if not present
-            semantic_score = fund.get("norm_semantic_score", 0)
-            bm25_score = fund.get("norm_bm25_score", 0)
-            fuzzy_name_score = fund.get("norm_fuzzy_name_score", 0)
-            
-            # Calculate weighted sum
-            combined_score = (
-                self.alpha * semantic_score +
-                self.beta * bm25_score +
-                self.gamma * fuzzy_name_score
-            )
-            
-            fund["combined_score"] = combined_score
+        if not funds:
+            return []
         
-        # Sort by combined score (descending)
-        sorted_funds = sorted(funds, key=lambda x: x.get("combined_score", 0), reverse=True)
+        # One row per fund: normalized semantic, BM25 and fuzzy name scores
+        norm = np.array([
+            (fund.get("norm_semantic_score", 0),
+             fund.get("norm_bm25_score", 0),
+             fund.get("norm_fuzzy_name_score", 0))
+            for fund in funds
+        ], dtype=np.float64)
         
-        return sorted_funds
+        # Calculate weighted sum for all funds at once
+        combined = self.alpha * norm[:, 0] + self.beta * norm[:, 1] + self.gamma * norm[:, 2]
+        for fund, combined_score in zip(funds, combined.tolist()):
+            fund["combined_score"] = combined_score
+        
+        # Sort by combined score (descending, ties keep their order)
+        order = np.argsort(-combined, kind="stable")
+        return [funds[i] for i in order]
     
     def fuse(self, bm25_results, semantic_results, filtered_funds=None, keywords=None):
         """
@@ -92,6 +90,10 @@ class ScoreFusion:
         Returns:
             sorted list of funds with combined scores
         """
+        # Nothing retrieved by either ranker: nothing to score or sort
+        if not semantic_results and not bm25_results:
+            return []
+        
         # Start with semantic results as primary list
         all_funds = semantic_results.copy()
         
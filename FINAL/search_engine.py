@@ -1,25 +1,28 @@
 import os
-import json
 import numpy as np
 import faiss
 import pandas as pd
-from sentence_transformers import SentenceTransformer
 import logging
+from functools import lru_cache
 from query_parser import QueryParser  # Import the query parser
 from enhanced_retrieval import EnhancedRetrieval  # Import the enhanced retrieval component
 import utils  # Import the utils module
+from embedding_indexing import IVF_NPROBE, EMBEDDING_MODEL_NAME  # settings the index was built with
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# IVF indexes probe enough lists to see this many vectors per requested result
+NPROBE_CANDIDATE_FACTOR = 4
+
 class MutualFundSearchEngine:
     """
     A search engine for mutual funds using embedding-based semantic search.
     """
     
     def __init__(self, 
-                 model_name="all-MiniLM-L6-v2",
+                 model_name=None,
                  embeddings_path=None,
                  index_path=None,
                  id_mapping_path=None,
@@ -30,7 +33,9 @@ class MutualFundSearchEngine:
         
         Args:
             model_name (str): The name of the SentenceTransformer model to use
-            embeddings_path (str): Path to the stored fund embeddings
+                (defaults to the model the FAISS index was built with)
+            embeddings_path (str): Path to the stored fund embeddings (not loaded;
+                the FAISS index holds the vectors searched)
             index_path (str): Path to the FAISS index file
             id_mapping_path (str): Path to the fund ID to index mapping
             funds_data_path (str): Path to the preprocessed fund data
@@ -53,6 +58,15 @@ class MutualFundSearchEngine:
             
         logger.info(f"Using paths: embeddings={embeddings_path}, index={index_path}, id_mapping={id_mapping_path}")
         
+        # Model and backend the index was built with, recorded by embedding_indexing.py
+        index_metadata = None
+        if os.path.exists(output_paths["embedding_meta"]):
+            index_metadata = utils.load_json(output_paths["embedding_meta"])
+        else:
+            logger.warning("No embedding metadata found; cannot verify the index matches the query model")
+        if model_name is None:
+            model_name = index_metadata["model_name"] if index_metadata else EMBEDDING_MODEL_NAME
+        
         # Initialize the query parser
         self.query_parser = QueryParser()
         logger.info("Initialized query parser")
@@ -64,34 +78,38 @@ class MutualFundSearchEngine:
         # Load the embedding model
         try:
             logger.info(f"Loading embedding model: {model_name}")
-            self.model = SentenceTransformer(model_name)
+            self.model = utils.load_embedding_model(model_name)
         except Exception as e:
             logger.error(f"Failed to load embedding model: {str(e)}")
             raise
         
+        # Queries must be embedded by the same model variant as the indexed funds
+        if index_metadata is not None:
+            query_metadata = {"model_name": model_name, "embedding_backend": self.model.embedding_backend}
+            if query_metadata != index_metadata:
+                raise RuntimeError(f"FAISS index was built with {index_metadata} but queries use "
+                                   f"{query_metadata}; run embedding_indexing.py to rebuild it")
+        
+        # Repeated queries reuse their embedding instead of re-running the encoder
+        self.encode_query = lru_cache(maxsize=utils.QUERY_EMBEDDING_CACHE_SIZE)(self._encode_query)
+        
         # Load the FAISS index
         try:
             logger.info(f"Loading FAISS index from {index_path}")
-            self.index = faiss.read_index(index_path)
+            # Memory-map IVF inverted lists so they are paged in on demand
+            self.index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP)
+            # None for flat indexes, which need no search-time tuning
+            self.ivf = faiss.try_extract_index_ivf(self.index)
         except Exception as e:
             logger.error(f"Failed to load FAISS index: {str(e)}")
             raise
         
-        # Load the fund embeddings
-        try:
-            logger.info(f"Loading fund embeddings from {embeddings_path}")
-            self.embeddings = np.load(embeddings_path)
-        except Exception as e:
-            logger.error(f"Failed to load fund embeddings: {str(e)}")
-            raise
-            
         # Load the fund ID to index mapping
         try:
             logger.info(f"Loading fund ID to index mapping from {id_mapping_path}")
-            with open(id_mapping_path, 'r') as f:
-                self.fund_id_to_index = json.load(f)
-                # Create reverse mapping (index to fund ID)
-                self.index_to_fund_id = {v: k for k, v in self.fund_id_to_index.items()}
+            self.fund_id_to_index = utils.load_json(id_mapping_path)
+            # Create reverse mapping (index to fund ID)
+            self.index_to_fund_id = {v: k for k, v in self.fund_id_to_index.items()}
         except Exception as e:
             logger.error(f"Failed to load fund ID mapping: {str(e)}")
             raise
@@ -99,8 +117,7 @@ class MutualFundSearchEngine:
         # Load the fund data
         try:
             logger.info(f"Loading fund data from {funds_data_path}")
-            with open(funds_data_path, 'r') as f:
-                self.funds_data = json.load(f)
+            self.funds_data = utils.load_json(funds_data_path)
         except Exception as e:
             logger.error(f"Failed to load fund data: {str(e)}")
             raise
@@ -132,35 +149,37 @@ class MutualFundSearchEngine:
         Returns:
             str: A human-readable description of the fund
         """
-        description = f"{fund_data.get('fund_name', 'This fund')} is a {fund_data.get('category', '').lower()} "
-        description += f"fund from {fund_data.get('fund_house', '')}. "
+        parts = [
+            f"{fund_data.get('fund_name', 'This fund')} is a {fund_data.get('category', '').lower()} ",
+            f"fund from {fund_data.get('fund_house', '')}. "
+        ]
         
         # Add risk level if available
         if fund_data.get('risk_level'):
-            description += f"It has a {fund_data.get('risk_level', '').lower()} risk profile. "
+            parts.append(f"It has a {fund_data.get('risk_level', '').lower()} risk profile. ")
             
         # Add return information if available
         if fund_data.get('return_3yr'):
-            description += f"The 3-year return is {fund_data.get('return_3yr', 0):.2f}%. "
+            parts.append(f"The 3-year return is {fund_data.get('return_3yr', 0):.2f}%. ")
         if fund_data.get('return_5yr'):
-            description += f"The 5-year return is {fund_data.get('return_5yr', 0):.2f}%. "
+            parts.append(f"The 5-year return is {fund_data.get('return_5yr', 0):.2f}%. ")
             
         # Add expense ratio if available
         if fund_data.get('expense_ratio'):
-            description += f"The expense ratio is {fund_data.get('expense_ratio', 0):.2f}%. "
+            parts.append(f"The expense ratio is {fund_data.get('expense_ratio', 0):.2f}%. ")
             
         # Add information about top holdings if available
         if fund_data.get('top_holdings') and len(fund_data.get('top_holdings')) > 0:
             top_holdings = fund_data.get('top_holdings')[:3]  # Get top 3 holdings
-            description += f"Top holdings include {', '.join(top_holdings)}. "
+            parts.append(f"Top holdings include {', '.join(top_holdings)}. ")
             
         # Add information about sector allocation if available
         if fund_data.get('sector_allocation') and len(fund_data.get('sector_allocation')) > 0:
             top_sectors = fund_data.get('sector_allocation')[:2]  # Get top 2 sectors
             sector_info = [f"{s[0]} ({s[1]:.1f}%)" for s in top_sectors]
-            description += f"Major sector allocations: {', '.join(sector_info)}. "
+            parts.append(f"Major sector allocations: {', '.join(sector_info)}. ")
             
-        return description
+        return "".join(parts)
         
     def search(self, query, top_k=5, apply_filters=True, use_enhanced_scoring=True):
         """
@@ -188,21 +207,24 @@ class MutualFundSearchEngine:
                 filter_explanation = self.query_parser.explain_filters(extracted_filters)
                 logger.info(f"Filter explanation: {filter_explanation}")
             
-            # Generate embedding for the query
-            query_embedding = self.model.encode([query])[0]
-            
-            # Normalize the embedding (if the index was created with normalized vectors)
-            faiss.normalize_L2(np.array([query_embedding], dtype=np.float32))
+            # Generate the normalized embedding for the query (cached per query)
+            query_embedding = self.encode_query(query)
             
             # Search the index
             # In Phase 4, we get more initial candidates (top_k * 3) to allow for reranking
-            D, I = self.index.search(np.array([query_embedding], dtype=np.float32), top_k * 3)
+            k = top_k * 3
+            if self.ivf is None:
+                D, I = self.index.search(query_embedding, k)
+            else:
+                # Per-call search parameters need faiss >= 1.7.3
+                D, I = self.index.search(query_embedding, k, params=self._search_params(k))
             
             # Process results
             results = []
             for i, (distance, idx) in enumerate(zip(D[0], I[0])):
-                # Convert distance to similarity score (1 - distance for normalized vectors)
-                similarity = 1 - distance
+                # The index uses inner product on normalized vectors, so the
+                # returned distance is already the cosine similarity
+                similarity = distance
                 
                 # Get fund ID
                 fund_id = self.index_to_fund_id.get(str(idx))
@@ -239,7 +261,7 @@ class MutualFundSearchEngine:
                     results = self.enhanced_retrieval.add_bm25_results(
                         results, query, self.corpus, self.index_to_fund_id, top_k=2
                     )
-                
+            
             # Limit to top_k results
             results = results[:top_k]
             
@@ -255,6 +277,23 @@ class MutualFundSearchEngine:
         except Exception as e:
             logger.error(f"Error during search: {str(e)}")
             raise
+    
+    def _encode_query(self, query):
+        """Encode one query as a normalized (1, dim) float32 array (cached, do not modify)"""
+        query_embedding = np.ascontiguousarray(
+            self.model.encode([query], convert_to_numpy=True), dtype=np.float32
+        )
+        
+        # Normalize the embedding (the index was created with normalized vectors)
+        faiss.normalize_L2(query_embedding)
+        return query_embedding
+    
+    def _search_params(self, k):
+        """IVF search parameters with nprobe scaled to the number of candidates"""
+        list_size = max(1, self.ivf.ntotal // self.ivf.nlist)
+        # Never probe fewer lists than the index was built with
+        nprobe = max(IVF_NPROBE, -(-NPROBE_CANDIDATE_FACTOR * k // list_size))
+        return faiss.SearchParametersIVF(nprobe=min(nprobe, self.ivf.nlist))
             
     def filter_results(self, results, filters):
         """
@@ -273,6 +312,9 @@ class MutualFundSearchEngine:
         
         filtered_results = []
         
+        # Lowercase string filter values once, not once per result
+        lowered = {key: value.lower() for key, value in filters.items() if isinstance(value, str)}
+        
         for result in results:
             fund_data = result.get('fund_data', {})
             include = True
@@ -281,24 +323,24 @@ class MutualFundSearchEngine:
             for filter_key, filter_value in filters.items():
                 # Handle different types of filters
                 if filter_key == 'amc' and 'amc' in fund_data:
-                    if fund_data['amc'].lower() != filter_value.lower():
+                    if fund_data['amc'].lower() != lowered[filter_key]:
                         include = False
                         break
                     
                 elif filter_key == 'category' and 'category' in fund_data:
-                    if fund_data['category'].lower() != filter_value.lower():
+                    if fund_data['category'].lower() != lowered[filter_key]:
                         include = False
                         break
                     
                 elif filter_key == 'risk_level' and 'risk_level' in fund_data:
-                    if fund_data['risk_level'].lower() != filter_value.lower():
+                    if fund_data['risk_level'].lower() != lowered[filter_key]:
                         include = False
                         break
                     
                 elif filter_key == 'sector' and 'sectors' in fund_data:
                     # Check if the filter sector is in the fund's sectors
                     fund_sectors = [s.lower() for s in fund_data.get('sectors', [])]
-                    if filter_value.lower() not in fund_sectors:
+                    if lowered[filter_key] not in fund_sectors:
                         include = False
                         break
                     
@@ -1,8 +1,12 @@
 import numpy as np
 import pandas as pd
 import faiss
-from sentence_transformers import SentenceTransformer
 import torch
+from functools import lru_cache
+import utils
+
+# Corpora at least this large store 8-bit quantized vectors in the index
+SQ8_MIN_VECTORS = 1000
 
 class SemanticSearch:
     def __init__(self, fund_data, model_name="all-MiniLM-L6-v2"):
@@ -16,10 +20,14 @@ class SemanticSearch:
         """
         self.fund_data = fund_data
         self.corpus = self.fund_data['description'].tolist()
+        self.model_name = model_name
+        
+        # Hits copy these prebuilt row dicts (see _collect_results)
+        self.records = self.fund_data.to_dict('records')
         
         # Load model
         print(f"Loading embedding model: {model_name}")
-        self.model = SentenceTransformer(model_name)
+        self.model = utils.load_embedding_model(model_name)
         
         # Get embedding dimension
         self.embedding_dim = self.model.get_sentence_embedding_dimension()
@@ -27,25 +35,69 @@ class SemanticSearch:
         # Create FAISS index
         self._create_index()
         
+        # Repeated queries reuse their embedding instead of re-running the encoder
+        self.encode_query = lru_cache(maxsize=utils.QUERY_EMBEDDING_CACHE_SIZE)(self._encode_query)
+        
     def _create_index(self):
         """Create FAISS index from fund descriptions"""
-        # Generate embeddings for all fund descriptions
-        print("Generating embeddings for fund corpus...")
-        self.corpus_embeddings = self.model.encode(
-            self.corpus, 
-            show_progress_bar=True, 
-            convert_to_numpy=True
-        )
+        # Embeddings for all fund descriptions
+        self.corpus_embeddings = self._load_or_encode_corpus()
         
         # Normalize embeddings to unit length for cosine similarity
         faiss.normalize_L2(self.corpus_embeddings)
         
-        # Create FAISS index
-        self.index = faiss.IndexFlatIP(self.embedding_dim)  # Inner product for cosine similarity
+        # Create FAISS index (inner product for cosine similarity)
+        if len(self.corpus_embeddings) < SQ8_MIN_VECTORS:
+            self.index = faiss.IndexFlatIP(self.embedding_dim)
+        else:
+            # 8-bit scalar quantization: 4x less memory to scan per query
+            self.index = faiss.IndexScalarQuantizer(
+                self.embedding_dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT
+            )
+            self.index.train(self.corpus_embeddings)
         self.index.add(self.corpus_embeddings)
         
         print(f"FAISS index created with {self.index.ntotal} vectors")
         
+    def _load_or_encode_corpus(self):
+        """Encode the corpus, reusing embeddings saved for the same model, backend and corpus"""
+        # ONNX and torch INT8 variants embed slightly differently, so vectors
+        # cached under one must not be searched with queries from the other
+        digest = utils.corpus_digest(self.corpus, self.model_name, self.model.embedding_backend)
+        cache_path = utils.PROCESSED_DIR / f"semantic_embeddings_{digest}.npy"
+        
+        if cache_path.exists():
+            print(f"Loading cached corpus embeddings from {cache_path}")
+            try:
+                embeddings = np.load(cache_path)
+            except (OSError, ValueError, EOFError) as e:
+                print(f"Ignoring unreadable embedding cache {cache_path}: {e}")
+                embeddings = None
+            if embeddings is not None and len(embeddings) == len(self.corpus):
+                utils.touch_cache(cache_path)
+                # Nothing gets encoded on this path, so run one throwaway encode
+                # now rather than leaving the model's lazy setup to the first query
+                self.model.encode(["warmup"], convert_to_numpy=True)
+                return embeddings
+        
+        print("Generating embeddings for fund corpus...")
+        embeddings = np.asarray(self.model.encode(
+            self.corpus, 
+            show_progress_bar=True, 
+            convert_to_numpy=True
+        ), dtype=np.float32)
+        utils.write_atomic(cache_path, lambda f: np.save(f, embeddings))
+        utils.remove_unused_caches("semantic_embeddings_*.npy")
+        return embeddings
+        
+    def _encode_query(self, query):
+        """Encode a query as a normalized (1, dim) float32 array (cached, do not modify)"""
+        query_embedding = np.reshape(self.model.encode(query), (1, -1)).astype(np.float32)
+        
+        # Normalize query embedding for cosine similarity
+        faiss.normalize_L2(query_embedding)
+        return query_embedding
+        
     def search(self, query, top_k=10):
         """
         Search for funds semantically similar to the query
@@ -57,23 +109,23 @@ class SemanticSearch:
         Returns:
             list of dictionaries with fund details and similarity scores
         """
-        # Generate embedding for the query
-        query_embedding = self.model.encode(query)
-        
-        # Normalize query embedding for cosine similarity
-        faiss.normalize_L2(np.reshape(query_embedding, (1, -1)))
+        # Generate normalized embedding for the query
+        query_embedding = self.encode_query(query)
         
         # Search the index
-        scores, indices = self.index.search(np.reshape(query_embedding, (1, -1)), k=top_k)
-        
+        scores, indices = self.index.search(query_embedding, k=top_k)
+        return self._collect_results(scores[0], indices[0])
+    
+    def _collect_results(self, scores, indices):
+        """Build result dicts for one query's FAISS hits"""
         # Return fund details with scores
         results = []
-        for i, idx in enumerate(indices[0]):
+        for score, idx in zip(scores, indices):
             if idx < 0 or idx >= len(self.corpus):
                 continue  # Skip invalid indices
                 
-            fund_details = self.fund_data.iloc[idx].to_dict()
-            fund_details['semantic_score'] = float(scores[0][i])  # Convert to native Python float
+            fund_details = dict(self.records[idx])  # Copied, callers add fields
+            fund_details['semantic_score'] = float(score)  # Convert to native Python float
             results.append(fund_details)
         
         return results
@@ -1,10 +1,10 @@
+import html
+import importlib.util
 import streamlit as st
 import requests
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from streamlit_lottie import st_lottie
-import json
+
+# pandas and plotly are only needed for the fund analysis charts and are
+# imported there, keeping them off the startup path of the search page
 
 # Configure the page
 st.set_page_config(
@@ -17,6 +17,37 @@ st.set_page_config(
     }
 )
 
+# Fund card markup, filled with %-formatting from a card view
+FUND_CARD_TEMPLATE = (
+    "<div class='fund-card %(card_class)s'>"
+    "<h4>%(name)s</h4>"
+    "<p>%(ticker)s • %(fund_house)s</p>"
+    "<div class='fund-card-row'>"
+    "<span><strong>Risk:</strong> %(risk)s</span>"
+    "<span><strong>Category:</strong> %(category)s</span>"
+    "</div>"
+    "%(returns_html)s"
+    "</div>"
+)
+
+FUND_RETURNS_TEMPLATE = (
+    "<h5>Returns</h5>"
+    "<div class='fund-card-row'>"
+    "<div><div class='fund-return-label'>1 Year</div><div class='fund-return-value'>%(return_1y)s</div></div>"
+    "<div><div class='fund-return-label'>3 Years</div><div class='fund-return-value'>%(return_3y)s</div></div>"
+    "<div><div class='fund-return-label'>5 Years</div><div class='fund-return-value'>%(return_5y)s</div></div>"
+    "</div>"
+)
+
+FUND_SCORES_TEMPLATE = (
+    "<div class='fund-card-row'>"
+    "<div><div class='fund-return-label'>Semantic</div><div class='fund-return-value'>%(semantic)s</div></div>"
+    "<div><div class='fund-return-label'>Metadata</div><div class='fund-return-value'>%(metadata)s</div></div>"
+    "<div><div class='fund-return-label'>Fuzzy</div><div class='fund-return-value'>%(fuzzy)s</div></div>"
+    "<div><div class='fund-return-label'>Final</div><div class='fund-return-value'>%(final)s</div></div>"
+    "</div>"
+)
+
 # API Endpoints
 API_BASE = "http://localhost:5000/api"
 SEARCH_ENDPOINT = f"{API_BASE}/search"
@@ -88,6 +119,19 @@ st.markdown("""
     .fund-card-low-match {
         border-left: 4px solid #F44336;
     }
+    .fund-card-row {
+        display: flex;
+        justify-content: space-between;
+        gap: 1rem;
+        margin-bottom: 0.5rem;
+    }
+    .fund-return-label {
+        color: #AAA;
+        font-size: 0.85rem;
+    }
+    .fund-return-value {
+        font-size: 1.4rem;
+    }
     .stButton>button {
         background-color: #6E48AA;
         color: white;
@@ -137,15 +181,20 @@ def load_lottie_url(url: str):
     except:
         return None
 
+# Call an API endpoint, caching successful responses across reruns.
+# Failures raise instead of returning, so they are never cached.
+@st.cache_data(show_spinner=False, max_entries=256, ttl=1800)
+def post_cached(endpoint, payload_items):
+    response = requests.post(endpoint, json=dict(payload_items), timeout=10)
+    data = response.json()
+    if not data.get("success", False):
+        raise ValueError(data.get("error") or "Request failed")
+    return data
+
 # Search for funds
 def search_funds(query, top_k=5):
     try:
-        response = requests.post(
-            SEARCH_ENDPOINT, 
-            json={"query": query, "top_k": top_k},
-            timeout=10
-        )
-        return response.json()
+        return post_cached(SEARCH_ENDPOINT, (("query", " ".join(query.split())), ("top_k", top_k)))
     except Exception as e:
         st.error(f"Error while searching: {str(e)}")
         return {"success": False, "results": [], "llm_response": ""}
@@ -153,12 +202,7 @@ def search_funds(query, top_k=5):
 # Analyze a fund
 def analyze_fund(fund_id):
     try:
-        response = requests.post(
-            ANALYZE_ENDPOINT, 
-            json={"fundId": fund_id},
-            timeout=10
-        )
-        return response.json()
+        return post_cached(ANALYZE_ENDPOINT, (("fundId", fund_id),))
     except Exception as e:
         st.error(f"Error while analyzing fund: {str(e)}")
         return {"success": False}
@@ -176,6 +220,42 @@ def get_score_color(score):
     except:
         return ""
 
+# Button callbacks update state before the rerun the click triggers,
+# so no extra st.experimental_rerun() pass is needed
+def show_fund_analysis(fund):
+    st.session_state.selected_fund = fund
+    st.session_state.show_analysis = True
+
+def hide_fund_analysis():
+    st.session_state.show_analysis = False
+
+# Precompute display fields for all result cards in one pass
+def build_card_views(results):
+    # Cards are rendered with unsafe_allow_html, so every API-supplied value
+    # is HTML-escaped before it goes into a template
+    views = []
+    for fund in results:
+        returns = fund.get("returns") or {}
+        scores = fund.get("scoreExplanation") or {}
+        view = {
+            "card_class": get_score_color(scores.get("final", "0")) if scores else "",
+            "name": html.escape(str(fund.get("name", "Unknown Fund"))),
+            "ticker": html.escape(str(fund.get("ticker", "N/A"))),
+            "fund_house": html.escape(str(fund.get("fundHouse", "N/A"))),
+            "risk": html.escape(str(fund.get("risk", "N/A"))),
+            "category": html.escape(str(fund.get("category", "N/A"))),
+            "return_1y": html.escape(f"{returns.get('oneYear', 0)}%"),
+            "return_3y": html.escape(f"{returns.get('threeYear', 0)}%"),
+            "return_5y": html.escape(f"{returns.get('fiveYear', 0)}%"),
+            "scores": scores
+        }
+        view["returns_html"] = FUND_RETURNS_TEMPLATE % view if "returns" in fund else ""
+        view["scores_html"] = FUND_SCORES_TEMPLATE % {
+            key: html.escape(str(scores.get(key, "0"))) for key in ("semantic", "metadata", "fuzzy", "final")
+        }
+        views.append(view)
+    return views
+
 # Header
 col1, col2, col3 = st.columns([1, 3, 1])
 with col2:
@@ -205,6 +285,7 @@ with st.form(key="search_form"):
 
 # Process search 
 if search_button and query and api_available:
+    # Repeated searches are answered from post_cached's cache
     with st.spinner("Searching for funds..."):
         response = search_funds(query, top_k)
         
@@ -225,62 +306,26 @@ if search_button and query and api_available:
             cols = st.columns(2)
             
             # Display funds in a grid
-            for i, fund in enumerate(results):
+            for i, (fund, view) in enumerate(zip(results, build_card_views(results))):
                 col_idx = i % 2
                 
-                # Determine card style based on match score
-                card_class = ""
-                if fund.get("scoreExplanation"):
-                    final_score = fund["scoreExplanation"].get("final", "0")
-                    card_class = get_score_color(final_score)
-                
                 with cols[col_idx]:
                     with st.container():
-                        st.markdown(f"<div class='fund-card {card_class}'>", unsafe_allow_html=True)
-                        
-                        # Fund title and basic info
-                        st.markdown(f"#### {fund.get('name', 'Unknown Fund')}")
-                        st.markdown(f"{fund.get('ticker', 'N/A')} • {fund.get('fundHouse', 'N/A')}")
-                        
-                        # Risk and category
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            st.markdown(f"**Risk:** {fund.get('risk', 'N/A')}")
-                        with col2:
-                            st.markdown(f"**Category:** {fund.get('category', 'N/A')}")
-                        
-                        # Returns
-                        if "returns" in fund:
-                            st.markdown("##### Returns")
-                            ret_col1, ret_col2, ret_col3 = st.columns(3)
-                            with ret_col1:
-                                st.metric("1 Year", f"{fund['returns'].get('oneYear', 0)}%")
-                            with ret_col2:
-                                st.metric("3 Years", f"{fund['returns'].get('threeYear', 0)}%")
-                            with ret_col3:
-                                st.metric("5 Years", f"{fund['returns'].get('fiveYear', 0)}%")
+                        # Card details in a single markdown call
+                        st.markdown(FUND_CARD_TEMPLATE % view, unsafe_allow_html=True)
                         
                         # Match scores if available
-                        if fund.get("scoreExplanation"):
+                        if view["scores"]:
                             with st.expander("Match Scores"):
-                                scores = fund["scoreExplanation"]
-                                score_cols = st.columns(4)
-                                with score_cols[0]:
-                                    st.metric("Semantic", scores.get("semantic", "0"))
-                                with score_cols[1]:
-                                    st.metric("Metadata", scores.get("metadata", "0"))
-                                with score_cols[2]:
-                                    st.metric("Fuzzy", scores.get("fuzzy", "0"))
-                                with score_cols[3]:
-                                    st.metric("Final", scores.get("final", "0"))
+                                st.markdown(view["scores_html"], unsafe_allow_html=True)
                         
                         # View details button
-                        if st.button(f"View Details", key=f"view_{fund.get('id', i)}"):
-                            st.session_state.selected_fund = fund
-                            st.session_state.show_analysis = True
-                            st.experimental_rerun()
-                            
-                        st.markdown("</div>", unsafe_allow_html=True)
+                        st.button(
+                            "View Details",
+                            key=f"view_{fund.get('id', i)}",
+                            on_click=show_fund_analysis,
+                            args=(fund,)
+                        )
         else:
             st.warning("No funds found matching your query. Try a different search term.")
     else:
@@ -288,6 +333,16 @@ if search_button and query and api_available:
 
 # Fund Analysis Section
 if "selected_fund" in st.session_state and "show_analysis" in st.session_state and st.session_state.show_analysis:
+    import pandas as pd
+    import plotly.express as px
+    import plotly.io as pio
+
+    # Chart payloads are mostly floats; orjson serializes them much faster
+    # than the stdlib encoder plotly uses by default. plotly rejects the
+    # setting when orjson isn't installed, so keep its default then
+    if importlib.util.find_spec("orjson") is not None:
+        pio.json.config.default_engine = "orjson"
+
     fund = st.session_state.selected_fund
     
     st.markdown("---")
@@ -427,14 +482,10 @@ if "selected_fund" in st.session_state and "show_analysis" in st.session_state a
                 st.info("Sector allocation data not available")
         
         # Back button
-        if st.button("← Back to Search Results"):
-            st.session_state.show_analysis = False
-            st.experimental_rerun()
+        st.button("← Back to Search Results", on_click=hide_fund_analysis)
     else:
         st.error("Failed to retrieve fund analysis. Please try again.")
-        if st.button("← Back to Search Results"):
-            st.session_state.show_analysis = False
-            st.experimental_rerun()
+        st.button("← Back to Search Results", on_click=hide_fund_analysis)
 
 # Footer
 st.markdown("---")
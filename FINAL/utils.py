@@ -1,10 +1,20 @@
 import os
 import json
+import hashlib
+import tempfile
+import time
+from bisect import bisect_right
+from functools import lru_cache
 import pandas as pd
 import numpy as np
 from tqdm import tqdm
 from pathlib import Path
 
+try:
+    import orjson  # Faster JSON (de)serialization when installed
+except ImportError:
+    orjson = None
+
 # Project directories
 PROJECT_DIR = Path(os.path.dirname(os.path.abspath(__file__)))
 # Check if we're in the FINAL directory, and handle paths accordingly
@@ -38,21 +48,127 @@ def get_output_paths():
     """Return paths to output files"""
     return {
         "enriched_fund_data": PROCESSED_DIR / "enriched_fund_data.csv",
-        "fund_descriptions": PROCESSED_DIR / "fund_descriptions.csv",
+        "fund_descriptions": PROCESSED_DIR / "fund_descriptions.parquet",
         "fund_corpus": PROCESSED_DIR / "fund_corpus.txt",
         "fund_embeddings": PROCESSED_DIR / "fund_embeddings.npy",
         "faiss_index": PROCESSED_DIR / "faiss_index.bin",
+        "embedding_meta": PROCESSED_DIR / "embedding_meta.json",  # Model/backend of embeddings and index
         "fund_id_to_index": PROCESSED_DIR / "fund_id_to_index.json",
         "preprocessed_funds": PROCESSED_DIR / "preprocessed_funds.json"  # Added missing path
     }
 
+# Use an INT8-quantized ONNX Runtime export of the embedding model on CPU.
+# Opt-in: needs sentence-transformers>=3.2 with optimum and onnxruntime installed
+USE_ONNX_EMBEDDINGS = False
+ONNX_QUANTIZATION = "avx2"  # sentence-transformers quantization config name
+ONNX_QUANTIZED_FILE = f"onnx/model_qint8_{ONNX_QUANTIZATION}.onnx"
+# When falling back to PyTorch on CPU, quantize Linear layers to INT8
+QUANTIZE_TORCH_EMBEDDINGS = True
+# Distinct query embeddings kept per search instance (SemanticSearch and
+# MutualFundSearchEngine each cache their own)
+QUERY_EMBEDDING_CACHE_SIZE = 4096
+# Derived-data caches in PROCESSED_DIR unused for this long are deleted
+CACHE_MAX_AGE_DAYS = 30
+
 def get_model_paths():
     """Return paths to model files"""
     return {
         "embedding_model": MODELS_DIR / "embedding_model",
+        "onnx_embedding_model": MODELS_DIR / "onnx_embedding_model",
         "llm_model": MODELS_DIR / "phi-2.gguf"
     }
 
+def load_embedding_model(model_name):
+    """
+    Load a SentenceTransformer embedding model
+    
+    Uses an INT8-quantized ONNX Runtime export when USE_ONNX_EMBEDDINGS is set
+    (exported once under MODELS_DIR and reused), otherwise the PyTorch model, dynamically
+    quantized to INT8 when it runs on CPU. The variant that was loaded is
+    recorded as model.embedding_backend, since the variants' embeddings differ.
+    
+    Args:
+        model_name: name of the sentence-transformers model
+        
+    Returns:
+        SentenceTransformer model
+    """
+    from sentence_transformers import SentenceTransformer
+    
+    if USE_ONNX_EMBEDDINGS:
+        onnx_dir = get_model_paths()["onnx_embedding_model"] / model_name.replace("/", "__")
+        try:
+            if not (onnx_dir / ONNX_QUANTIZED_FILE).exists():
+                from sentence_transformers import export_dynamic_quantized_onnx_model
+                print(f"Exporting {model_name} to quantized ONNX at {onnx_dir}")
+                onnx_model = SentenceTransformer(model_name, backend="onnx")
+                onnx_model.save_pretrained(str(onnx_dir))
+                export_dynamic_quantized_onnx_model(onnx_model, ONNX_QUANTIZATION, str(onnx_dir))
+            
+            model = SentenceTransformer(
+                str(onnx_dir), backend="onnx",
+                model_kwargs={"file_name": ONNX_QUANTIZED_FILE}
+            )
+            model.embedding_backend = f"onnx-qint8-{ONNX_QUANTIZATION}"
+            return model
+        except Exception as e:
+            # Older sentence-transformers or missing optimum/onnxruntime
+            print(f"ONNX embedding backend unavailable ({e}), using PyTorch model")
+    
+    import torch
+    
+    model = SentenceTransformer(model_name)
+    backend = "torch"
+    if QUANTIZE_TORCH_EMBEDDINGS and model.device.type == "cpu":
+        # INT8 dynamic quantization of the Linear layers that dominate CPU time
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        backend = "torch-qint8"
+    model.embedding_backend = backend
+    return model
+
+def corpus_digest(corpus, *key_parts):
+    """Short hex digest of key_parts and every document in corpus, for naming cache files"""
+    digest = hashlib.sha1()
+    for item in (*key_parts, *corpus):
+        digest.update(str(item).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+def write_atomic(path, write):
+    """
+    Call write(f) on a temporary binary file next to path, then move it onto
+    path, so an interrupted write never leaves a truncated file behind
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+def touch_cache(path):
+    """Mark a cache file as used, so remove_unused_caches keeps it"""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+def remove_unused_caches(pattern, max_age_days=CACHE_MAX_AGE_DAYS):
+    """
+    Delete files in PROCESSED_DIR matching the glob pattern that haven't been
+    written or used for max_age_days. Caches of other corpora (e.g. a demo's
+    sample data) are left alone as long as something still uses them.
+    """
+    cutoff = time.time() - max_age_days * 86400
+    for path in PROCESSED_DIR.glob(pattern):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+        except OSError as e:
+            print(f"Could not remove unused cache file {path}: {e}")
+
 def load_processed_data():
     """Load preprocessed data"""
     output_paths = get_output_paths()
@@ -65,8 +181,9 @@ def load_processed_data():
         print(f"Loaded enriched fund data: {len(data['enriched_fund_data'])} funds")
     
     # Load fund descriptions
-    if os.path.exists(output_paths["fund_descriptions"]):
-        data["fund_descriptions"] = pd.read_csv(output_paths["fund_descriptions"])
+    fund_descriptions = load_table(output_paths["fund_descriptions"])
+    if fund_descriptions is not None:
+        data["fund_descriptions"] = fund_descriptions
         print(f"Loaded fund descriptions: {len(data['fund_descriptions'])} descriptions")
     
     # Load fund corpus
@@ -77,63 +194,134 @@ def load_processed_data():
     
     # Load fund_id to index mapping
     if os.path.exists(output_paths["fund_id_to_index"]):
-        with open(output_paths["fund_id_to_index"], "r") as f:
-            data["fund_id_to_index"] = json.load(f)
+        data["fund_id_to_index"] = load_json(output_paths["fund_id_to_index"])
         print(f"Loaded fund_id to index mapping for {len(data['fund_id_to_index'])} funds")
     
     return data
 
+def top_k_indices(scores, k):
+    """Indices of the k highest scores, best first (argpartition, then sort k)"""
+    scores = np.asarray(scores)
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    if k <= 0:
+        return np.array([], dtype=np.intp)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+def read_csv(path, **kwargs):
+    """Read a CSV with pandas' multithreaded pyarrow parser when available"""
+    try:
+        return pd.read_csv(path, engine="pyarrow", **kwargs)
+    except ImportError:
+        return pd.read_csv(path, **kwargs)
+
+def save_table(df, path):
+    """Save a DataFrame as zstd-compressed Parquet"""
+    df.to_parquet(path, index=False, compression="zstd")
+
+def load_table(path):
+    """Load a DataFrame saved by save_table, falling back to an older CSV copy"""
+    path = Path(path)
+    if path.exists():
+        return pd.read_parquet(path)
+    csv_path = path.with_suffix(".csv")
+    if csv_path.exists():
+        return read_csv(csv_path)
+    return None
+
+def parse_json(data):
+    """Parse a JSON document (bytes or str), using orjson when available"""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass  # e.g. NaN literals written by the json module
+    
+    return json.loads(data)
+
+def load_json(path):
+    """Load a JSON file, using orjson when available"""
+    with open(path, "rb") as f:
+        return parse_json(f.read())
+
+def save_json(data, path, indent=False):
+    """Save data as a JSON file, using orjson when available"""
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(data, option=option))
+    else:
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2 if indent else None)
+
 def clean_text(text):
     """Clean and normalize text for better matching"""
     if not isinstance(text, str):
         return ""
     
-    # Convert to lowercase
-    text = text.lower()
-    
-    # Remove extra whitespace
-    text = " ".join(text.split())
-    
-    return text
+    return _clean_text(text)
 
-def normalize_fund_name(name):
-    """Normalize fund names for better matching"""
-    if not isinstance(name, str):
-        return ""
-    
-    # Remove common suffixes
-    suffixes = [
+@lru_cache(maxsize=8192)
+def _clean_text(text):
+    # Convert to lowercase and remove extra whitespace. Fund fields and
+    # queries repeat across reranking passes, so results are memoized.
+    return " ".join(text.lower().split())
+
+# Plan/option suffixes stripped from fund names, in the order they are tried.
+# Both the " - suffix" and " suffix" spellings are precomputed once here.
+FUND_NAME_SUFFIXES = tuple(
+    (f" - {suffix}", f" {suffix}") for suffix in [
         "direct growth", "direct plan growth", "direct plan - growth",
         "regular growth", "regular plan growth", "regular plan - growth",
         "growth", "direct", "regular"
     ]
+)
+ANY_FUND_NAME_SUFFIX = tuple(spelling for pair in FUND_NAME_SUFFIXES for spelling in pair)
+
+def normalize_fund_name(name):
+    """Normalize fund names for better matching"""
+    if not isinstance(name, str):
+        return ""
     
+    return _normalize_fund_name(name)
+
+@lru_cache(maxsize=8192)
+def _normalize_fund_name(name):
     name = name.lower()
-    for suffix in suffixes:
-        if name.endswith(f" - {suffix}"):
-            name = name[:-len(f" - {suffix}")]
-        elif name.endswith(f" {suffix}"):
-            name = name[:-len(f" {suffix}")]
     
-    # Remove extra whitespace
-    name = " ".join(name.split())
+    # Remove common suffixes (skip the scan entirely when none can match)
+    if name.endswith(ANY_FUND_NAME_SUFFIX):
+        for dashed, spaced in FUND_NAME_SUFFIXES:
+            if name.endswith(dashed):
+                name = name[:-len(dashed)]
+            elif name.endswith(spaced):
+                name = name[:-len(spaced)]
     
-    return name
+    # Remove extra whitespace
+    return " ".join(name.split())
+
+# Currency display units: amounts below the first threshold are shown raw,
+# from 1 lakh (100 thousand) in lakhs and from 1 crore (10 million) in crores
+CURRENCY_THRESHOLDS = (100000, 10000000)
+CURRENCY_UNITS = ((1, ""), (100000, " L"), (10000000, " Cr"))
 
 def format_currency(amount, currency="₹"):
     """Format amount as currency"""
     if pd.isna(amount):
         return "N/A"
     
-    if amount >= 10000000:  # 1 crore = 10 million
-        return f"{currency}{amount/10000000:.2f} Cr"
-    elif amount >= 100000:  # 1 lakh = 100 thousand
-        return f"{currency}{amount/100000:.2f} L"
-    else:
-        return f"{currency}{amount:.2f}"
+    scale, suffix = CURRENCY_UNITS[bisect_right(CURRENCY_THRESHOLDS, amount)]
+    return f"{currency}{amount/scale:.2f}{suffix}"
 
 def format_percentage(value):
     """Format value as percentage"""
+    # Fast path for plain numbers (NaN is the only float unequal to itself)
+    if isinstance(value, (int, float)):
+        return f"{value:.2f}%" if value == value else "N/A"
+    
     if pd.isna(value):
         return "N/A"
     
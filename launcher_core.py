@@ -0,0 +1,100 @@
+"""
+Find My Fund - Shared Launcher Helpers
+Port probing, detached process launch and per-thread output capture
+shared by the launcher scripts
+"""
+
+import http.client
+import platform
+import socket
+import subprocess
+import threading
+import time
+
+IS_WINDOWS = platform.system() == "Windows"
+
+def check_port(port, timeout=1.0):
+    """Check if something is listening on localhost:port"""
+    try:
+        with socket.create_connection(("localhost", port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+def first_open_port(ports, timeout=1.0):
+    """Return the first of ports that accepts connections, or None"""
+    for port in ports:
+        if check_port(port, timeout=timeout):
+            return port
+    return None
+
+def wait_for_ports(ports, timeout):
+    """Poll ports with exponential backoff (25ms up to 0.5s); return the first to open, or None"""
+    deadline = time.monotonic() + timeout
+    delay = 0.025
+    while time.monotonic() < deadline:
+        port = first_open_port(ports, timeout=delay)
+        if port is not None:
+            return port
+        time.sleep(delay)
+        delay = min(delay * 1.5, 0.5)
+    return None
+
+def wait_for_port(port, timeout):
+    """Wait until localhost:port accepts connections; False if timeout expires first"""
+    return wait_for_ports([port], timeout) is not None
+
+def wait_for_http(port, timeout=5):
+    """Poll GET / on localhost:port until it answers without a server error; False on timeout"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        connection = http.client.HTTPConnection("localhost", port, timeout=0.5)
+        try:
+            connection.request("GET", "/")
+            if connection.getresponse().status < 500:
+                return True
+        except (OSError, http.client.HTTPException):
+            pass
+        finally:
+            connection.close()
+        time.sleep(0.1)
+    return False
+
+def launch_detached(cmd, cwd=None):
+    """Start cmd in its own console window on Windows, or in its own session elsewhere"""
+    if IS_WINDOWS:
+        return subprocess.Popen(
+            cmd,
+            cwd=cwd,
+            creationflags=subprocess.CREATE_NEW_CONSOLE,
+            close_fds=True
+        )
+    # Output goes nowhere rather than into a pipe nobody reads, which
+    # would eventually fill up and stall the service
+    return subprocess.Popen(
+        cmd,
+        cwd=cwd,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True
+    )
+
+# Set per thread by collect_output so background steps don't interleave their
+# messages with the ones printed on the main thread
+_output = threading.local()
+
+def emit(text):
+    """Print text, or keep it for later when running under collect_output"""
+    lines = getattr(_output, "lines", None)
+    if lines is None:
+        print(text)
+    else:
+        lines.append(text)
+
+def collect_output(func, *args):
+    """Run func(*args) and return (its result, the messages it would have printed)"""
+    _output.lines = lines = []
+    try:
+        return func(*args), lines
+    finally:
+        _output.lines = None
@@ -758,9 +758,10 @@ def main():
     print_colored("  • Or press Ctrl+C here to exit (components will continue running)", Colors.YELLOW)
     
     try:
-        # Keep the script running so user can see the output
+        # Keep the script running so user can see the output; an hour-long
+        # sleep still ends on Ctrl+C, which Event.wait() would not on Windows
         while True:
-            time.sleep(1)
+            time.sleep(3600)
     except KeyboardInterrupt:
         print_colored("\n👋 Exiting launcher. Services will continue running.", Colors.YELLOW)
     
@@ -11,15 +11,19 @@ import subprocess
 import argparse
 import time
 import webbrowser
-from threading import Thread
 
-def run_backend(port):
-    """Run the backend Flask API"""
+def start_backend(port):
+    """Start the backend Flask API without waiting for it"""
     print(f"[*] Starting backend on port {port}...")
     backend_cmd = [sys.executable, "FINAL/rag_ui_bridge.py", "--port", str(port), "--debug"]
-    
+    return subprocess.Popen(backend_cmd)
+
+def run_backend(port):
+    """Run the backend Flask API"""
     try:
-        subprocess.run(backend_cmd, check=True)
+        process = start_backend(port)
+        if process.wait() != 0:
+            raise subprocess.CalledProcessError(process.returncode, process.args)
     except KeyboardInterrupt:
         print("[*] Backend stopped")
     except Exception as e:
@@ -28,8 +32,8 @@ def run_backend(port):
     
     return True
 
-def run_frontend(port):
-    """Run the frontend React app"""
+def start_frontend(port):
+    """Start the frontend React app without waiting for it"""
     print(f"[*] Starting frontend on port {port}...")
     
     if not os.path.exists("ui/node_modules"):
@@ -42,9 +46,14 @@ def run_frontend(port):
     env["PORT"] = str(port)
     
     frontend_cmd = ["npm", "run", "dev", "--", "--port", str(port)]
-    
+    return subprocess.Popen(frontend_cmd, cwd="ui", env=env)
+
+def run_frontend(port):
+    """Run the frontend React app"""
     try:
-        subprocess.run(frontend_cmd, cwd="ui", env=env, check=True)
+        process = start_frontend(port)
+        if process.wait() != 0:
+            raise subprocess.CalledProcessError(process.returncode, process.args)
     except KeyboardInterrupt:
         print("[*] Frontend stopped")
     except Exception as e:
@@ -82,22 +91,21 @@ def main():
             # Run only the frontend
             run_frontend(args.frontend_port)
         else:
-            # Run both backend and frontend in separate threads
-            backend_thread = Thread(target=run_backend, args=(args.backend_port,))
-            backend_thread.daemon = True
-            backend_thread.start()
-            
-            # Wait for backend to start
-            time.sleep(2)
-            
-            # Open browser after a delay
-            if not args.no_browser:
-                browser_thread = Thread(target=open_browser, args=(f"http://localhost:{args.frontend_port}",))
-                browser_thread.daemon = True
-                browser_thread.start()
-            
-            # Run frontend in the main thread
-            run_frontend(args.frontend_port)
+            # Both servers are child processes that inherit our stdout, so
+            # the main thread only opens the browser and waits
+            processes = [start_backend(args.backend_port)]
+            try:
+                processes.append(start_frontend(args.frontend_port))
+                
+                # Open browser after a delay
+                if not args.no_browser:
+                    open_browser(f"http://localhost:{args.frontend_port}")
+                
+                processes[-1].wait()
+            finally:
+                for process in processes:
+                    process.terminate()
+                    process.wait()
     except KeyboardInterrupt:
         print("[*] Shutting down FundAI...")
     except Exception as e:
@@ -14,6 +14,16 @@ import subprocess
 import webbrowser
 import argparse
 import json
+import socket
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from launcher_core import emit, collect_output
+
+try:
+    import psutil  # In-process process listing when installed
+except ImportError:
+    psutil = None
 
 # Get the base directory (where this script is located)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -44,12 +54,21 @@ class Colors:
 def print_colored(message, color=Colors.RESET, bold=False):
     """Print colored message to console"""
     if bold:
-        print(f"{Colors.BOLD}{color}{message}{Colors.RESET}")
+        emit(f"{Colors.BOLD}{color}{message}{Colors.RESET}")
     else:
-        print(f"{color}{message}{Colors.RESET}")
+        emit(f"{color}{message}{Colors.RESET}")
 
 def is_process_running(name):
     """Check if a process with the given name is running"""
+    if psutil is not None:
+        name = name.lower()
+        for process in psutil.process_iter(['name']):
+            process_name = (process.info['name'] or '').lower()
+            if process_name == name or process_name == f"{name}.exe":
+                return True
+        return False
+    
+    # Without psutil, fall back to asking PowerShell
     try:
         cmd = f'powershell -Command "Get-Process -Name {name} -ErrorAction SilentlyContinue | Measure-Object | Select-Object -ExpandProperty Count"'
         result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
@@ -58,28 +77,31 @@ def is_process_running(name):
         return False
 
 def is_port_in_use(port):
-    """Check if a port is in use"""
+    """Check if something is listening on a local port"""
     try:
-        cmd = f'powershell -Command "Get-NetTCPConnection -LocalPort {port} -ErrorAction SilentlyContinue | Measure-Object | Select-Object -ExpandProperty Count"'
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-        return int(result.stdout.strip()) > 0
-    except:
+        with socket.create_connection(("127.0.0.1", port), timeout=0.1):
+            return True
+    except OSError:
         return False
 
+def wait_for_port(port, timeout):
+    """Poll until localhost:port accepts connections; False if timeout expires first"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if is_port_in_use(port):
+            return True
+        time.sleep(0.25)
+    return False
+
 def check_api_health():
     """Check if the API server is running and healthy"""
     try:
-        cmd = f'powershell -Command "try {{ $result = Invoke-RestMethod -Uri \'http://localhost:{API_PORT}/api/health\' -Method GET -TimeoutSec 2 -ErrorAction Stop; $result | ConvertTo-Json }} catch {{ Write-Output \'\' }}"'
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-        if result.returncode == 0 and result.stdout.strip():
-            try:
-                health_data = json.loads(result.stdout)
-                if health_data.get("status") == "ok":
-                    return True, health_data.get("ollama_available", False)
-            except:
-                pass
+        with urllib.request.urlopen(f"http://localhost:{API_PORT}/api/health", timeout=2) as response:
+            health_data = json.loads(response.read())
+        if health_data.get("status") == "ok":
+            return True, health_data.get("ollama_available", False)
         return False, False
-    except:
+    except Exception:
         return False, False
 
 def start_ollama():
@@ -108,8 +130,8 @@ def start_ollama():
         print_colored("✅ Ollama started", Colors.GREEN)
         print_colored("⚠️ It may take a moment to initialize...", Colors.YELLOW)
         
-        # Wait a bit for Ollama to start
-        time.sleep(5)
+        # Wait (up to 5 seconds) until Ollama accepts connections
+        wait_for_port(OLLAMA_PORT, 5)
         return True
     except Exception as e:
         print_colored(f"❌ Error starting Ollama: {str(e)}", Colors.RED)
@@ -197,8 +219,8 @@ def start_frontend():
         print_colored("✅ UI startup process initiated", Colors.GREEN)
         print_colored("⚠️ The UI may take a moment to initialize...", Colors.YELLOW)
         
-        # Wait a bit before continuing
-        time.sleep(5)
+        # Wait (up to 5 seconds) until the dev server accepts connections
+        wait_for_port(UI_PORT, 5)
         return True
     except Exception as e:
         print_colored(f"❌ Error starting UI: {str(e)}", Colors.RED)
@@ -256,15 +278,22 @@ def main():
     print_colored("  Find My Fund - All-in-One Launcher", Colors.BLUE, bold=True)
     print_colored("========================================", Colors.BLUE, bold=True)
     
-    # Start components
-    if not args.no_ollama:
-        start_ollama()
-    
-    if not args.no_api:
-        start_backend()
-    
-    if not args.no_ui:
-        start_frontend()
+    # Start components. The UI starts in the background while Ollama and then
+    # the API start here (the API checks Ollama's models when it initializes).
+    # The UI's messages are held back and printed once it finishes
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        ui_future = pool.submit(collect_output, start_frontend) if not args.no_ui else None
+        
+        if not args.no_ollama:
+            start_ollama()
+        
+        if not args.no_api:
+            start_backend()
+        
+        if ui_future is not None:
+            _, ui_messages = ui_future.result()
+            for line in ui_messages:
+                print(line)
     
     # Wait for everything to stabilize
     time.sleep(2)
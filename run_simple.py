@@ -8,19 +8,30 @@ import os
 import sys
 import time
 import subprocess
-import webbrowser
-import platform
-import shutil
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+
+import launcher_core
+from launcher_core import IS_WINDOWS, check_port, first_open_port, launch_detached, emit, collect_output
 
 # Get the base directory
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 FINAL_DIR = os.path.join(BASE_DIR, "FINAL")
 UI_DIR = os.path.join(BASE_DIR, "ui")
 
+# Platform-specific executable name, resolved once
+OLLAMA_CMD = "ollama.exe" if IS_WINDOWS else "ollama"
+# Ollama install locations, checked in order before searching PATH
+OLLAMA_INSTALL_PATHS = (
+    os.path.expanduser("~\\AppData\\Local\\Programs\\Ollama\\ollama.exe"),
+    os.path.expandvars("%ProgramFiles%\\Ollama\\ollama.exe"),
+)
+
 # Port configuration
 OLLAMA_PORT = 11434
 API_PORT = 5000
 UI_PORT = 3000
+UI_PORTS = (UI_PORT, UI_PORT + 1)  # Vite moves to the next port if the first is taken
 
 # Styling for console output
 class Style:
@@ -32,72 +43,55 @@ class Style:
     BOLD = '\033[1m'
 
 def print_header(text):
-    print(f"{Style.BLUE}{Style.BOLD}{'='*50}{Style.RESET}")
-    print(f"{Style.BLUE}{Style.BOLD}{text.center(50)}{Style.RESET}")
-    print(f"{Style.BLUE}{Style.BOLD}{'='*50}{Style.RESET}")
+    emit(f"{Style.BLUE}{Style.BOLD}{'='*50}{Style.RESET}")
+    emit(f"{Style.BLUE}{Style.BOLD}{text.center(50)}{Style.RESET}")
+    emit(f"{Style.BLUE}{Style.BOLD}{'='*50}{Style.RESET}")
 
 def print_step(step, status="", color=Style.BLUE):
     if status:
-        print(f"{color}[{step}]{Style.RESET} {status}")
+        emit(f"{color}[{step}]{Style.RESET} {status}")
     else:
-        print(f"{color}[{step}]{Style.RESET}")
+        emit(f"{color}[{step}]{Style.RESET}")
 
 def print_success(message):
-    print(f"{Style.GREEN}✓ {message}{Style.RESET}")
+    emit(f"{Style.GREEN}✓ {message}{Style.RESET}")
 
 def print_error(message):
-    print(f"{Style.RED}✗ {message}{Style.RESET}")
+    emit(f"{Style.RED}✗ {message}{Style.RESET}")
 
 def print_warning(message):
-    print(f"{Style.YELLOW}! {message}{Style.RESET}")
+    emit(f"{Style.YELLOW}! {message}{Style.RESET}")
 
-def check_port(port):
-    """Check if a port is in use"""
-    import socket
-    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    try:
-        s.connect(("localhost", port))
-        s.shutdown(socket.SHUT_RDWR)
-        return True
-    except:
-        return False
-    finally:
-        s.close()
+def wait_for_ports(ports, timeout=30, step_name="Service"):
+    """Wait for any of ports to become available and report the outcome"""
+    port_list = " or ".join(str(port) for port in ports)
+    print_step(step_name, f"Waiting for port {port_list} to be ready...")
+    
+    port = launcher_core.wait_for_ports(ports, timeout)
+    if port is not None:
+        print_success(f"{step_name} is ready on port {port}")
+    else:
+        print_error(f"{step_name} did not respond on port {port_list} within {timeout} seconds")
+    return port
 
 def wait_for_port(port, timeout=30, step_name="Service"):
     """Wait for a port to become available"""
-    print_step(step_name, f"Waiting for port {port} to be ready...")
-    
-    for i in range(timeout):
-        if check_port(port):
-            print_success(f"{step_name} is ready on port {port}")
-            return True
-        print(".", end="", flush=True)
-        time.sleep(1)
-    
-    print()
-    print_error(f"{step_name} did not respond on port {port} within {timeout} seconds")
-    return False
+    return wait_for_ports([port], timeout, step_name) is not None
 
 def check_ollama():
     """Check if Ollama is installed and running"""
+    import shutil
     print_header("CHECKING OLLAMA")
     
-    # Find Ollama executable
-    ollama_path = None
-    
-    # Windows default path
-    windows_path = os.path.expanduser("~\\AppData\\Local\\Programs\\Ollama\\ollama.exe")
-    if os.path.exists(windows_path):
-        ollama_path = windows_path
+    # Find Ollama executable, stopping at the first install location that exists
+    ollama_path = next((path for path in OLLAMA_INSTALL_PATHS if os.path.isfile(path)), None)
+    if ollama_path:
         print_success(f"Found Ollama at: {ollama_path}")
     else:
         # Try to find in PATH
-        ollama_cmd = "ollama.exe" if platform.system() == "Windows" else "ollama"
-        ollama_in_path = shutil.which(ollama_cmd)
+        ollama_path = shutil.which(OLLAMA_CMD)
         
-        if ollama_in_path:
-            ollama_path = ollama_in_path
+        if ollama_path:
             print_success(f"Found Ollama in PATH: {ollama_path}")
         else:
             print_error("Ollama not found. Please install Ollama from https://ollama.ai")
@@ -113,21 +107,7 @@ def check_ollama():
         
         # Start Ollama
         try:
-            if platform.system() == "Windows":
-                # Start Ollama in a new window
-                subprocess.Popen(
-                    [ollama_path, "serve"],
-                    creationflags=subprocess.CREATE_NEW_CONSOLE,
-                    close_fds=True
-                )
-            else:
-                # For non-Windows platforms
-                subprocess.Popen(
-                    [ollama_path, "serve"],
-                    stdout=subprocess.DEVNULL,
-                    stderr=subprocess.DEVNULL,
-                    start_new_session=True
-                )
+            launch_detached([ollama_path, "serve"])
             
             # Wait for Ollama to start
             if not wait_for_port(OLLAMA_PORT, timeout=30, step_name="Ollama"):
@@ -148,23 +128,26 @@ def check_dependencies():
     missing_packages = []
     
     for package in required_packages:
-        try:
-            __import__(package)
+        # find_spec only locates the package; importing it would load torch etc.
+        if importlib.util.find_spec(package) is not None:
             print_success(f"Found package: {package}")
-        except ImportError:
+        else:
             missing_packages.append(package)
             print_error(f"Missing package: {package}")
     
     if missing_packages:
         print_warning("Installing missing packages...")
-        for package in missing_packages:
-            print_step("pip", f"Installing {package}")
-            try:
-                subprocess.check_call([sys.executable, "-m", "pip", "install", package])
-                print_success(f"Installed {package}")
-            except subprocess.CalledProcessError as e:
-                print_error(f"Failed to install {package}: {str(e)}")
-                return False
+        print_step("pip", f"Installing {', '.join(missing_packages)}")
+        try:
+            # One pip run resolves all packages together and starts pip only once
+            subprocess.check_call([
+                sys.executable, "-m", "pip", "install",
+                "--disable-pip-version-check", "--no-input", *missing_packages
+            ])
+            print_success(f"Installed {', '.join(missing_packages)}")
+        except subprocess.CalledProcessError as e:
+            print_error(f"Failed to install {', '.join(missing_packages)}: {str(e)}")
+            return False
     
     return True
 
@@ -188,22 +171,7 @@ def start_api_server():
     print_step("API", "Starting server...")
     
     try:
-        if platform.system() == "Windows":
-            api_process = subprocess.Popen(
-                [sys.executable, api_server_path],
-                cwd=FINAL_DIR,
-                creationflags=subprocess.CREATE_NEW_CONSOLE,
-                close_fds=True
-            )
-        else:
-            # For non-Windows platforms
-            api_process = subprocess.Popen(
-                [sys.executable, api_server_path],
-                cwd=FINAL_DIR,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                start_new_session=True
-            )
+        launch_detached([sys.executable, api_server_path], cwd=FINAL_DIR)
         
         # Wait for API server to start
         if not wait_for_port(API_PORT, timeout=30, step_name="API Server"):
@@ -217,6 +185,7 @@ def start_api_server():
 
 def start_ui():
     """Start the React UI"""
+    import shutil
     print_header("STARTING UI")
     
     # Check if UI directory exists
@@ -225,13 +194,14 @@ def start_ui():
         return False
     
     # Check if UI is already running
-    if check_port(UI_PORT) or check_port(UI_PORT + 1):
-        ui_port = UI_PORT if check_port(UI_PORT) else UI_PORT + 1
+    ui_port = first_open_port(UI_PORTS)
+    if ui_port is not None:
         print_success(f"UI is already running on port {ui_port}")
         return True
     
     # Check if npm is installed
-    if shutil.which("npm") is None:
+    npm_path = shutil.which("npm")
+    if npm_path is None:
         print_error("npm not found. Please install Node.js and npm.")
         return False
     
@@ -239,32 +209,11 @@ def start_ui():
     print_step("UI", "Starting React frontend...")
     
     try:
-        ui_cmd = "npm run dev"
-        
-        if platform.system() == "Windows":
-            # Start in a new window
-            subprocess.Popen(
-                f"cmd /c {ui_cmd}",
-                cwd=UI_DIR,
-                creationflags=subprocess.CREATE_NEW_CONSOLE,
-                close_fds=True,
-                shell=True
-            )
-        else:
-            # For non-Windows platforms
-            subprocess.Popen(
-                ui_cmd,
-                cwd=UI_DIR,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                shell=True,
-                start_new_session=True
-            )
+        launch_detached([npm_path, "run", "dev"], cwd=UI_DIR)
         
-        # Wait for UI to start
-        for port in [UI_PORT, UI_PORT + 1]:
-            if wait_for_port(port, timeout=60, step_name=f"UI (port {port})"):
-                return True
+        # Wait for UI to start on whichever port Vite picks
+        if wait_for_ports(UI_PORTS, timeout=60, step_name="UI") is not None:
+            return True
         
         print_error("UI failed to start. Check the UI window for errors.")
         return False
@@ -274,12 +223,13 @@ def start_ui():
 
 def open_browser_to_ui():
     """Open browser to UI"""
+    import webbrowser  # Only needed here, so not loaded at launcher startup
     print_header("OPENING BROWSER")
     
     # Determine which port the UI is running on
-    ui_port = UI_PORT if check_port(UI_PORT) else UI_PORT + 1
+    ui_port = first_open_port(UI_PORTS)
     
-    if not check_port(ui_port):
+    if ui_port is None:
         print_error("UI is not running. Cannot open browser.")
         return False
     
@@ -298,25 +248,34 @@ def main():
     """Main function"""
     print_header("FIND MY FUND - DIAGNOSTIC LAUNCHER")
     
-    # Check if Ollama is available
-    ollama_available = check_ollama()
-    if not ollama_available:
-        print_warning("Continuing without Ollama...")
-    
-    # Check dependencies
-    dependencies_ok = check_dependencies()
-    if not dependencies_ok:
+    # Check dependencies before starting anything, so a failed check exits
+    # without leaving services running
+    if not check_dependencies():
         print_error("Missing dependencies. Please install them and try again.")
         return 1
     
-    # Start API server
-    api_ok = start_api_server()
+    # The UI doesn't depend on the other services, so it starts in the
+    # background while Ollama and then the API server (which checks for
+    # Ollama when it loads) start here. Its messages are printed afterwards
+    # as one block
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        ui_future = executor.submit(collect_output, start_ui)
+        
+        ollama_available = check_ollama()
+        if not ollama_available:
+            print_warning("Continuing without Ollama...")
+        
+        api_ok = start_api_server()
+        
+        ui_ok, ui_messages = ui_future.result()
+    
+    for line in ui_messages:
+        print(line)
+    
     if not api_ok:
         print_error("Failed to start API server. Exiting.")
         return 1
     
-    # Start UI
-    ui_ok = start_ui()
     if not ui_ok:
         print_warning("Failed to start UI. The API server is still running.")
         return 1
@@ -328,9 +287,9 @@ def main():
     print("\nPress Ctrl+C to exit this launcher. Components will continue running.")
     
     try:
-        # Keep the script running
+        # Keep the script running, waking once an hour rather than every second
         while True:
-            time.sleep(1)
+            time.sleep(3600)
     except KeyboardInterrupt:
         print("\nExiting launcher. Components will continue running.")
     
@@ -3,130 +3,105 @@ import os
 import sys
 import time
 import argparse
+import shutil
 import subprocess
-import psutil
 import webbrowser
-from colorama import init, Fore, Style
+from concurrent.futures import ThreadPoolExecutor
+from colorama import Fore, Style
 
-# Initialize colorama for colored terminal output
-init()
+# Add parent directory to sys.path to import the shared launcher helpers
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from launcher_core import check_port, wait_for_port, wait_for_http, launch_detached, emit, collect_output
 
-def is_process_running(process_name):
-    """Check if a process with the given name is running"""
-    for proc in psutil.process_iter(['name']):
-        if proc.info['name'] == process_name:
-            return True
-    return False
-
-def is_port_in_use(port):
-    """Check if a port is in use"""
-    for conn in psutil.net_connections():
-        if conn.laddr.port == port:
-            return True
-    return False
+# Enable ANSI colors; on Windows 10+ this switches the console to native VT
+# mode instead of wrapping stdout in colorama's escape-code translator
+try:
+    from colorama import just_fix_windows_console
+    just_fix_windows_console()
+except ImportError:  # colorama < 0.4.6
+    from colorama import init
+    init()
 
 def start_ollama():
     """Start Ollama if not already running"""
-    if is_process_running("ollama.exe"):
-        print(f"{Fore.GREEN}✓ Ollama is already running{Style.RESET_ALL}")
+    # A listener on Ollama's port is enough; scanning every process is not needed
+    if check_port(11434):
+        emit(f"{Fore.GREEN}✓ Ollama is already running{Style.RESET_ALL}")
         return True
     
-    print(f"{Fore.CYAN}Starting Ollama...{Style.RESET_ALL}")
+    emit(f"{Fore.CYAN}Starting Ollama...{Style.RESET_ALL}")
     try:
         # Try to find Ollama in the default installation path
         ollama_path = os.path.expanduser("~\\AppData\\Local\\Programs\\Ollama\\ollama.exe")
         
         if not os.path.exists(ollama_path):
-            print(f"{Fore.YELLOW}Warning: Ollama not found at {ollama_path}{Style.RESET_ALL}")
-            print(f"{Fore.YELLOW}Trying to run 'ollama' from PATH{Style.RESET_ALL}")
+            emit(f"{Fore.YELLOW}Warning: Ollama not found at {ollama_path}{Style.RESET_ALL}")
+            emit(f"{Fore.YELLOW}Trying to run 'ollama' from PATH{Style.RESET_ALL}")
             ollama_path = "ollama"
         
-        # Start Ollama in a new PowerShell window
-        powershell_cmd = [
-            "powershell", 
-            "-Command", 
-            f"Start-Process -FilePath '{ollama_path}' -ArgumentList 'serve' -WindowStyle Minimized"
-        ]
-        subprocess.Popen(powershell_cmd, shell=True)
+        # Start Ollama in a new console window
+        launch_detached([ollama_path, "serve"])
         
         # Wait for Ollama to start (up to 30 seconds)
-        for i in range(30):
-            if is_port_in_use(11434):
-                print(f"{Fore.GREEN}✓ Ollama started successfully{Style.RESET_ALL}")
-                return True
-            time.sleep(1)
-            print(".", end="", flush=True)
+        if wait_for_port(11434, 30):
+            emit(f"{Fore.GREEN}✓ Ollama started successfully{Style.RESET_ALL}")
+            return True
         
-        print(f"\n{Fore.RED}✗ Failed to start Ollama within 30 seconds{Style.RESET_ALL}")
+        emit(f"{Fore.RED}✗ Failed to start Ollama within 30 seconds{Style.RESET_ALL}")
         return False
     except Exception as e:
-        print(f"{Fore.RED}✗ Error starting Ollama: {str(e)}{Style.RESET_ALL}")
+        emit(f"{Fore.RED}✗ Error starting Ollama: {str(e)}{Style.RESET_ALL}")
         return False
 
 def start_api_server():
     """Start the Flask API server"""
-    if is_port_in_use(5000):
-        print(f"{Fore.GREEN}✓ API server is already running on port 5000{Style.RESET_ALL}")
+    if check_port(5000):
+        emit(f"{Fore.GREEN}✓ API server is already running on port 5000{Style.RESET_ALL}")
         return True
     
-    print(f"{Fore.CYAN}Starting API server...{Style.RESET_ALL}")
+    emit(f"{Fore.CYAN}Starting API server...{Style.RESET_ALL}")
     try:
         # Get the absolute path to the API server script
         api_server_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "FINAL", "api_server.py"))
         
-        # Start the API server in a new PowerShell window
-        powershell_cmd = [
-            "powershell", 
-            "-Command", 
-            f"Start-Process -FilePath 'python' -ArgumentList '{api_server_path}' -WorkingDirectory '{os.path.dirname(api_server_path)}' -WindowStyle Normal"
-        ]
-        subprocess.Popen(powershell_cmd, shell=True)
+        # Start the API server in a new console window
+        launch_detached([sys.executable, api_server_path], cwd=os.path.dirname(api_server_path))
         
         # Wait for the API server to start (up to 30 seconds)
-        for i in range(30):
-            if is_port_in_use(5000):
-                print(f"{Fore.GREEN}✓ API server started successfully{Style.RESET_ALL}")
-                return True
-            time.sleep(1)
-            print(".", end="", flush=True)
+        if wait_for_port(5000, 30):
+            emit(f"{Fore.GREEN}✓ API server started successfully{Style.RESET_ALL}")
+            return True
         
-        print(f"\n{Fore.RED}✗ Failed to start API server within 30 seconds{Style.RESET_ALL}")
+        emit(f"{Fore.RED}✗ Failed to start API server within 30 seconds{Style.RESET_ALL}")
         return False
     except Exception as e:
-        print(f"{Fore.RED}✗ Error starting API server: {str(e)}{Style.RESET_ALL}")
+        emit(f"{Fore.RED}✗ Error starting API server: {str(e)}{Style.RESET_ALL}")
         return False
 
 def start_ui():
     """Start the React UI"""
-    if is_port_in_use(3001):
-        print(f"{Fore.GREEN}✓ UI is already running on port 3001{Style.RESET_ALL}")
+    if check_port(3001):
+        emit(f"{Fore.GREEN}✓ UI is already running on port 3001{Style.RESET_ALL}")
         return True
     
-    print(f"{Fore.CYAN}Starting UI...{Style.RESET_ALL}")
+    emit(f"{Fore.CYAN}Starting UI...{Style.RESET_ALL}")
     try:
         # Get the absolute path to the UI directory
         ui_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "ui"))
         
-        # Start the UI in a new PowerShell window
-        powershell_cmd = [
-            "powershell", 
-            "-Command", 
-            f"Start-Process -FilePath 'cmd' -ArgumentList '/c cd {ui_dir} && npm run dev' -WindowStyle Normal"
-        ]
-        subprocess.Popen(powershell_cmd, shell=True)
+        # Start the UI in a new console window (npm is npm.cmd on Windows,
+        # so resolve its full path rather than going through a shell)
+        launch_detached([shutil.which("npm") or "npm", "run", "dev"], cwd=ui_dir)
         
         # Wait for the UI to start (up to 60 seconds)
-        for i in range(60):
-            if is_port_in_use(3001):
-                print(f"{Fore.GREEN}✓ UI started successfully{Style.RESET_ALL}")
-                return True
-            time.sleep(1)
-            print(".", end="", flush=True)
+        if wait_for_port(3001, 60):
+            emit(f"{Fore.GREEN}✓ UI started successfully{Style.RESET_ALL}")
+            return True
         
-        print(f"\n{Fore.RED}✗ Failed to start UI within 60 seconds{Style.RESET_ALL}")
+        emit(f"{Fore.RED}✗ Failed to start UI within 60 seconds{Style.RESET_ALL}")
         return False
     except Exception as e:
-        print(f"{Fore.RED}✗ Error starting UI: {str(e)}{Style.RESET_ALL}")
+        emit(f"{Fore.RED}✗ Error starting UI: {str(e)}{Style.RESET_ALL}")
         return False
 
 def run_tests():
@@ -142,12 +117,16 @@ def run_tests():
             return False
         
         # Run the test_runner.py script
+        # Merge stderr into stdout so a single pipe is drained and a chatty
+        # stderr can never fill up and block the child
+        # -u keeps the child from block-buffering its output into the pipe,
+        # so results stream as each test finishes
         process = subprocess.Popen(
-            f"python {test_runner_path}", 
-            shell=True,
+            [sys.executable, "-u", test_runner_path],
             stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1
         )
         
         # Print the output of the test_runner.py script
@@ -196,11 +175,6 @@ def main():
     
     # Check if required dependencies are installed
     missing_deps = []
-    try:
-        import psutil
-    except ImportError:
-        missing_deps.append("psutil")
-    
     try:
         import colorama
     except ImportError:
@@ -214,30 +188,37 @@ def main():
     # Parse command-line arguments
     args = parse_arguments()
     
-    # Start Ollama
-    if not args.no_ollama:
-        ollama_success = start_ollama()
+    # The API server checks for Ollama's model once, when it loads, so Ollama
+    # must be listening before the API starts. Only the UI is independent; it
+    # starts in the background and its messages are printed afterwards
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        ui_future = None if args.no_ui else executor.submit(collect_output, start_ui)
+        
+        ollama_success = args.no_ollama or start_ollama()
         if not ollama_success:
             print(f"{Fore.YELLOW}Continuing without Ollama...{Style.RESET_ALL}")
+        
+        # Start API server
+        api_success = args.no_api or start_api_server()
+        
+        ui_success, ui_messages = (True, []) if ui_future is None else ui_future.result()
     
-    # Start API server
-    if not args.no_api:
-        api_success = start_api_server()
-        if not api_success:
-            print(f"{Fore.RED}Failed to start API server. Exiting.{Style.RESET_ALL}")
-            return
+    for line in ui_messages:
+        print(line)
     
-    # Start UI
-    if not args.no_ui:
-        ui_success = start_ui()
-        if not ui_success:
-            print(f"{Fore.RED}Failed to start UI. Exiting.{Style.RESET_ALL}")
-            return
+    if not api_success:
+        print(f"{Fore.RED}Failed to start API server. Exiting.{Style.RESET_ALL}")
+        return
+    
+    if not ui_success:
+        print(f"{Fore.RED}Failed to start UI. Exiting.{Style.RESET_ALL}")
+        return
     
     # Open browser
     if not args.no_browser and not args.no_ui:
-        # Wait a bit for the UI to fully initialize
-        time.sleep(5)
+        # Open as soon as the UI serves its page, giving up after 5 seconds
+        if not wait_for_http(3001, timeout=5):
+            print(f"{Fore.YELLOW}UI is not responding yet; opening the browser anyway{Style.RESET_ALL}")
         open_browser()
     
     # Run tests if requested
@@ -257,8 +238,9 @@ def main():
     
     # Keep the script running until interrupted
     try:
+        # time.sleep is interruptible by Ctrl+C on Windows, so sleep long
         while True:
-            time.sleep(1)
+            time.sleep(3600)
     except KeyboardInterrupt:
         print(f"{Fore.CYAN}Script interrupted. Services will continue running.{Style.RESET_ALL}")
 
@@ -14,11 +14,144 @@ import sys
 import csv
 import re
 import argparse
-from typing import List, Dict, Any, Optional
+import tempfile
+import ast
+import traceback
+from functools import lru_cache
+from typing import List, Dict, Any, Iterable, Iterator, Optional
+
+try:
+    import orjson  # Faster JSON (de)serialization when installed
+except ImportError:
+    orjson = None
+
+CSV_READ_BUFFER = 1 << 20  # 1 MiB
+# How much of a .txt file to read when sniffing its format
+TXT_SNIFF_SIZE = 4096
+# Delimited files at least this large are parsed with pyarrow when installed
+ARROW_MIN_BYTES = 1 << 20
+# Full tracebacks for conversion errors only when CONVERT_DEBUG=1
+VERBOSE_ERRORS = os.environ.get("CONVERT_DEBUG") == "1"
+# Suffix of the sidecar stamp --skip-unchanged keeps next to each output
+STAMP_SUFFIX = '.stamp'
+
+# Patterns for pulling test case lists out of Python files
+LIST_ASSIGN_RE = re.compile(r'(\w+)\s*=\s*(\[[\s\S]*?\])')
+
+@lru_cache(maxsize=256)
+def var_assign_re(var_name: str) -> "re.Pattern":
+    """Compiled pattern matching a list assigned to var_name"""
+    return re.compile(fr'{re.escape(var_name)}\s*=\s*(\[[\s\S]*?\])')
+
+def parse_json(data: str) -> Any:
+    """Parse a JSON document, using orjson when available (same fallback as FINAL/utils.py)"""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass  # e.g. NaN literals written by the json module
+    return json.loads(data)
+
+def load_json(path: str) -> Any:
+    """Load a JSON file, using orjson when available"""
+    with open(path, 'rb') as f:
+        return parse_json(f.read())
+
+def dump_case(case: Dict[str, Any], minify: bool = False) -> bytes:
+    """Serialize one test case as an array element, indented unless minify"""
+    if minify:
+        if orjson is not None:
+            return orjson.dumps(case)
+        return json.dumps(case, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    if orjson is not None:
+        text = orjson.dumps(case, option=orjson.OPT_INDENT_2)
+    else:
+        text = json.dumps(case, indent=2).encode('utf-8')
+    # JSON strings cannot hold raw newlines, so this only indents structure
+    return text.replace(b'\n', b'\n  ')
+
+def save_json(cases: Iterable[Dict[str, Any]], path: str, minify: bool = False) -> int:
+    """
+    Stream test cases to path as a JSON array, one case at a time,
+    so cases can come from a generator without building the whole list.
+    
+    Cases go to a temporary file next to path, which replaces path only once
+    every case is written, so a failure while reading the input leaves any
+    existing output untouched instead of truncated. With minify, the JSON is
+    written compactly (no indentation, raw UTF-8).
+    
+    Returns the number of cases written.
+    """
+    if minify:
+        start, separator, end = b'[', b',', b']'
+    else:
+        start, separator, end = b'[\n  ', b',\n  ', b'\n]'
+    count = 0
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                    prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for case in cases:
+                f.write(separator if count else start)
+                f.write(dump_case(case, minify))
+                count += 1
+            f.write(end if count else b'[]')
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return count
+
+def read_cases_arrow(input_file: str, has_header: bool, query_col: int,
+                     expected_col: Optional[int], delimiter: str) -> Optional[Iterator[Dict[str, Any]]]:
+    """
+    Parse a delimited file with pyarrow's C reader and trim columns in bulk.
+    
+    Returns None when pyarrow isn't installed or the file can't be handled
+    this way (e.g. ragged rows, or too few columns), so the caller can fall
+    back to the csv module.
+    """
+    # Imported here so scripts importing this module don't load pyarrow
+    try:
+        import pyarrow as pa
+        from pyarrow import compute as pa_compute, csv as pa_csv
+    except ImportError:
+        return None
+    
+    try:
+        table = pa_csv.read_csv(
+            input_file,
+            read_options=pa_csv.ReadOptions(autogenerate_column_names=True,
+                                            skip_rows=1 if has_header else 0),
+            parse_options=pa_csv.ParseOptions(delimiter=delimiter, newlines_in_values=True),
+            # Read the columns we use as text so values like "NA" or "1.50" stay as written
+            convert_options=pa_csv.ConvertOptions(column_types={
+                f"f{col}": pa.string() for col in (query_col, expected_col) if col is not None
+            }),
+        )
+    except pa.ArrowInvalid:
+        return None
+    if table.num_columns <= query_col:
+        return None
+    
+    def text_column(index: int) -> List[str]:
+        return pa_compute.utf8_trim_whitespace(table.column(index)).to_pylist()
+    
+    queries = text_column(query_col)
+    if expected_col is None or table.num_columns <= expected_col:
+        return ({"query": query} for query in queries)
+    
+    def cases() -> Iterator[Dict[str, Any]]:
+        for query, expected in zip(queries, text_column(expected_col)):
+            test_case = {"query": query}
+            if expected:
+                test_case["expected_fund"] = expected
+            yield test_case
+    return cases()
 
 def convert_csv_tsv(input_file: str, output_file: str, has_header: bool = True, 
                     query_col: int = 0, expected_col: Optional[int] = 1, 
-                    delimiter: str = '\t') -> None:
+                    delimiter: str = '\t', minify: bool = False) -> None:
     """
     Convert a CSV/TSV file to the standard JSON format.
     
@@ -29,16 +162,9 @@ def convert_csv_tsv(input_file: str, output_file: str, has_header: bool = True,
         query_col: Column index for query (0-based)
         expected_col: Column index for expected fund (0-based), None if not available
         delimiter: Field delimiter ('\t' for TSV, ',' for CSV)
+        minify: Write compact JSON without indentation
     """
-    test_cases = []
-    
-    with open(input_file, 'r', encoding='utf-8') as f:
-        reader = csv.reader(f, delimiter=delimiter)
-        
-        # Skip header if needed
-        if has_header:
-            next(reader, None)
-        
+    def read_cases(reader) -> Iterator[Dict[str, Any]]:
         for row in reader:
             if not row or len(row) <= query_col:
                 continue
@@ -48,14 +174,31 @@ def convert_csv_tsv(input_file: str, output_file: str, has_header: bool = True,
             if expected_col is not None and len(row) > expected_col and row[expected_col].strip():
                 test_case["expected_fund"] = row[expected_col].strip()
                 
-            test_cases.append(test_case)
+            yield test_case
+    
+    if os.path.getsize(input_file) >= ARROW_MIN_BYTES:
+        cases = read_cases_arrow(input_file, has_header, query_col, expected_col, delimiter)
+        if cases is not None:
+            count = save_json(cases, output_file, minify)
+            print(f"Converted {count} test cases to {output_file}")
+            return
     
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(test_cases, f, indent=2)
+    # newline='' lets csv handle quoted line breaks; a large buffer means
+    # fewer read calls on big fixture files
+    with open(input_file, 'r', encoding='utf-8', newline='', buffering=CSV_READ_BUFFER) as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        
+        # Skip header if needed
+        if has_header:
+            next(reader, None)
+        
+        # Rows are written out as they are read
+        count = save_json(read_cases(reader), output_file, minify)
     
-    print(f"Converted {len(test_cases)} test cases to {output_file}")
+    print(f"Converted {count} test cases to {output_file}")
 
-def convert_python_format(input_file: str, output_file: str, var_name: Optional[str] = None) -> None:
+def convert_python_format(input_file: str, output_file: str, var_name: Optional[str] = None,
+                          minify: bool = False) -> None:
     """
     Extract test cases from a Python file.
     
@@ -63,6 +206,7 @@ def convert_python_format(input_file: str, output_file: str, var_name: Optional[
         input_file: Path to input Python file
         output_file: Path to output JSON file
         var_name: Name of the variable containing test cases, if None will try to find automatically
+        minify: Write compact JSON without indentation
     """
     try:
         with open(input_file, 'r', encoding='utf-8') as f:
@@ -70,44 +214,38 @@ def convert_python_format(input_file: str, output_file: str, var_name: Optional[
         
         # Try to extract the variable containing test cases
         if var_name:
-            pattern = fr'{var_name}\s*=\s*(\[[\s\S]*?\])'
-            matches = re.findall(pattern, content)
+            matches = var_assign_re(var_name).findall(content)
             if not matches:
                 print(f"Error: Could not find variable '{var_name}' in {input_file}")
                 return
             test_data_str = matches[0]
         else:
-            # Try to find list definitions that look like test cases
-            pattern = r'(\w+)\s*=\s*(\[[\s\S]*?\])'
-            matches = re.findall(pattern, content)
-            
-            if not matches:
-                print(f"Error: Could not find any list variables in {input_file}")
-                return
-            
-            # Look for list variables that contain dictionaries with 'query' keys
+            # Scan list definitions lazily and stop at the first one that
+            # contains dictionaries with 'query' keys
             test_data_str = None
-            for var, data_str in matches:
+            found_list = False
+            for match in LIST_ASSIGN_RE.finditer(content):
+                found_list = True
+                data_str = match.group(2)
                 if "'query'" in data_str or '"query"' in data_str:
-                    var_name = var
+                    var_name = match.group(1)
                     test_data_str = data_str
                     break
             
+            if not found_list:
+                print(f"Error: Could not find any list variables in {input_file}")
+                return
+            
             if not test_data_str:
                 print(f"Error: Could not find test cases with 'query' field in {input_file}")
                 return
         
-        # Convert the Python list literal to JSON format
-        # Replace Python True/False/None with JSON true/false/null
-        json_str = test_data_str.replace("True", "true").replace("False", "false").replace("None", "null")
-        # Replace Python-style quotes with JSON-style quotes
-        json_str = re.sub(r"'([^']*)':", r'"\1":', json_str)  # Replace keys
-        json_str = re.sub(r":\s*'([^']*)'", r': "\1"', json_str)  # Replace string values
-        
+        # Parse the Python list literal directly (handles True/False/None,
+        # either quote style, apostrophes and trailing commas)
         try:
-            test_cases = json.loads(json_str)
-        except json.JSONDecodeError as e:
-            print(f"Error converting Python format to JSON: {e}")
+            test_cases = ast.literal_eval(test_data_str)
+        except (ValueError, SyntaxError) as e:
+            print(f"Error parsing Python test cases: {e}")
             print("This might be due to complex Python structures that can't be easily converted.")
             print("Try simplifying the Python data structure or use a different approach.")
             return
@@ -136,18 +274,18 @@ def convert_python_format(input_file: str, output_file: str, var_name: Optional[
             print(f"Warning: No valid test cases found in {input_file}")
             return
             
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(standard_cases, f, indent=2)
+        save_json(standard_cases, output_file, minify)
         
         print(f"Converted {len(standard_cases)} test cases to {output_file}")
         
     except Exception as e:
         print(f"Error processing file {input_file}: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        if VERBOSE_ERRORS:
+            traceback.print_exc()
 
 def convert_json_format(input_file: str, output_file: str, 
-                        query_key: str = "query", expected_key: Optional[str] = "expected_fund") -> None:
+                        query_key: str = "query", expected_key: Optional[str] = "expected_fund",
+                        minify: bool = False) -> None:
     """
     Convert a JSON file with a different structure to our standard format.
     
@@ -156,10 +294,10 @@ def convert_json_format(input_file: str, output_file: str,
         output_file: Path to output JSON file
         query_key: Key for the query field in the input
         expected_key: Key for the expected fund field in the input, None if not available
+        minify: Write compact JSON without indentation
     """
     try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = load_json(input_file)
     except json.JSONDecodeError as e:
         print(f"Error loading JSON: {e}")
         return
@@ -191,59 +329,89 @@ def convert_json_format(input_file: str, output_file: str,
         print(f"Error: Could not find test cases with '{query_key}' field in {input_file}")
         return
     
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(standard_cases, f, indent=2)
+    save_json(standard_cases, output_file, minify)
     
     print(f"Converted {len(standard_cases)} test cases to {output_file}")
 
-def detect_and_convert(input_file: str, output_file: str) -> None:
+# Extensions whose format is known without sniffing content: (format name, converter).
+# Converters are called as convert(input_file, output_file, minify=...)
+EXTENSION_FORMATS = {
+    '.json': ("JSON", convert_json_format),
+    '.py': ("Python", convert_python_format),
+    '.csv': ("CSV", lambda input_file, output_file, minify=False:
+             convert_csv_tsv(input_file, output_file, delimiter=',', minify=minify)),
+    '.tsv': ("TSV", lambda input_file, output_file, minify=False:
+             convert_csv_tsv(input_file, output_file, delimiter='\t', minify=minify)),
+}
+
+def detect_and_convert(input_file: str, output_file: str, minify: bool = False) -> None:
     """
     Automatically detect file format and convert to standard format.
     
     Args:
         input_file: Path to input file
         output_file: Path to output JSON file
+        minify: Write compact JSON without indentation
     """
     _, ext = os.path.splitext(input_file.lower())
     
-    if ext == '.json':
-        print(f"Detected JSON format for {input_file}")
-        convert_json_format(input_file, output_file)
-    elif ext == '.py':
-        print(f"Detected Python format for {input_file}")
-        convert_python_format(input_file, output_file)
-    elif ext == '.csv':
-        print(f"Detected CSV format for {input_file}")
-        convert_csv_tsv(input_file, output_file, delimiter=',')
-    elif ext == '.tsv':
-        print(f"Detected TSV format for {input_file}")
-        convert_csv_tsv(input_file, output_file, delimiter='\t')
+    if ext in EXTENSION_FORMATS:
+        format_name, convert = EXTENSION_FORMATS[ext]
+        print(f"Detected {format_name} format for {input_file}")
+        convert(input_file, output_file, minify=minify)
     elif ext == '.txt':
-        # Try to detect format based on content
-        with open(input_file, 'r', encoding='utf-8') as f:
-            sample = f.read(1000)
-        
-        if '\t' in sample:
-            print(f"Detected tab-delimited format for {input_file}")
-            convert_csv_tsv(input_file, output_file, delimiter='\t')
-        elif ',' in sample:
-            print(f"Detected comma-delimited format for {input_file}")
-            convert_csv_tsv(input_file, output_file, delimiter=',')
-        else:
-            print(f"Detected line-by-line query format for {input_file}")
-            # Treat each line as a query with no expected results
-            with open(input_file, 'r', encoding='utf-8') as f:
-                lines = [line.strip() for line in f if line.strip()]
-            
-            test_cases = [{"query": line} for line in lines]
-            
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(test_cases, f, indent=2)
+        # Sniff the delimiter from whole lines at the start of the file; plain
+        # query lists have no consistent delimiter even when queries contain commas
+        with open(input_file, 'r', encoding='utf-8', newline='') as f:
+            sample = f.read(TXT_SNIFF_SIZE)
+            if len(sample) == TXT_SNIFF_SIZE and '\n' in sample:
+                sample = sample[:sample.rindex('\n') + 1]
+            try:
+                delimiter = csv.Sniffer().sniff(sample, delimiters='\t,').delimiter
+            except csv.Error:
+                delimiter = None
             
-            print(f"Converted {len(test_cases)} test cases to {output_file}")
+            if delimiter is None:
+                print(f"Detected line-by-line query format for {input_file}")
+                # Treat each line as a query with no expected results
+                f.seek(0)
+                count = save_json(({"query": line.strip()} for line in f if line.strip()), output_file, minify)
+                print(f"Converted {count} test cases to {output_file}")
+                return
+        
+        name = "tab" if delimiter == '\t' else "comma"
+        print(f"Detected {name}-delimited format for {input_file}")
+        convert_csv_tsv(input_file, output_file, delimiter=delimiter, minify=minify)
     else:
         print(f"Error: Unsupported file format for {input_file}")
 
+def conversion_stamp(input_file: str, output_file: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Identify a conversion by its options and the current (mtime, size) of input and output"""
+    input_stat = os.stat(input_file)
+    output_stat = os.stat(output_file)
+    return {
+        "input": os.path.abspath(input_file),
+        "input_mtime_ns": input_stat.st_mtime_ns,
+        "input_size": input_stat.st_size,
+        "output_mtime_ns": output_stat.st_mtime_ns,
+        "output_size": output_stat.st_size,
+        "options": options,
+    }
+
+def stamp_path(output_file: str) -> str:
+    """Sidecar file recording the last completed conversion into output_file"""
+    return output_file + STAMP_SUFFIX
+
+def output_is_current(input_file: str, output_file: str, options: Dict[str, Any]) -> bool:
+    """
+    Whether output_file was fully written from input_file, unchanged since,
+    with the same options, according to the stamp left by the last conversion
+    """
+    try:
+        return load_json(stamp_path(output_file)) == conversion_stamp(input_file, output_file, options)
+    except (OSError, ValueError):
+        return False
+
 def main():
     parser = argparse.ArgumentParser(description='Convert test files to standard JSON format for Find My Fund tests')
     parser.add_argument('input_file', help='Path to input test file')
@@ -256,6 +424,10 @@ def main():
     parser.add_argument('--expected-col', type=int, default=1, help='Column index for expected fund (0-based, for CSV/TSV)')
     parser.add_argument('--var-name', help='Variable name containing test cases (for Python)')
     parser.add_argument('--no-header', action='store_true', help='Input CSV/TSV has no header row')
+    parser.add_argument('--minify', action='store_true',
+                      help='Write compact JSON without indentation (smaller, faster to load)')
+    parser.add_argument('--skip-unchanged', action='store_true',
+                      help='Skip conversion if the output was fully written from the unchanged input with the same options')
     
     args = parser.parse_args()
     
@@ -267,27 +439,46 @@ def main():
         base, _ = os.path.splitext(args.input_file)
         args.output = f"{base}_converted.json"
     
+    options = {key: value for key, value in vars(args).items() if key != 'skip_unchanged'}
+    if args.skip_unchanged:
+        if output_is_current(args.input_file, args.output, options):
+            print(f"{args.output} is up to date, skipping conversion")
+            return
+        # Drop the old stamp first, so a conversion that fails leaves nothing
+        # vouching for whatever output is on disk
+        try:
+            os.remove(stamp_path(args.output))
+        except FileNotFoundError:
+            pass
+        try:
+            previous_output = os.stat(args.output)
+        except FileNotFoundError:
+            previous_output = None
+    
     if args.type == 'auto':
-        detect_and_convert(args.input_file, args.output)
+        detect_and_convert(args.input_file, args.output, args.minify)
     elif args.type == 'json':
-        convert_json_format(args.input_file, args.output, args.query_key, args.expected_key)
+        convert_json_format(args.input_file, args.output, args.query_key, args.expected_key, args.minify)
     elif args.type == 'python':
-        convert_python_format(args.input_file, args.output, args.var_name)
+        convert_python_format(args.input_file, args.output, args.var_name, args.minify)
     elif args.type in ['csv', 'tsv']:
         delimiter = ',' if args.type == 'csv' else '\t'
         convert_csv_tsv(args.input_file, args.output, not args.no_header, 
-                       args.query_col, args.expected_col, delimiter)
+                       args.query_col, args.expected_col, delimiter, args.minify)
     elif args.type == 'text':
         # Treat each line as a query with no expected results
         with open(args.input_file, 'r', encoding='utf-8') as f:
-            lines = [line.strip() for line in f if line.strip()]
-        
-        test_cases = [{"query": line} for line in lines]
+            count = save_json(({"query": line.strip()} for line in f if line.strip()), args.output, args.minify)
         
-        with open(args.output, 'w', encoding='utf-8') as f:
-            json.dump(test_cases, f, indent=2)
-        
-        print(f"Converted {len(test_cases)} test cases to {args.output}")
+        print(f"Converted {count} test cases to {args.output}")
+    
+    # save_json only puts complete files in place, so a newly replaced output
+    # means the conversion finished
+    if args.skip_unchanged and os.path.exists(args.output):
+        output = os.stat(args.output)
+        if previous_output is None or (output.st_ino, output.st_mtime_ns) != (previous_output.st_ino, previous_output.st_mtime_ns):
+            with open(stamp_path(args.output), 'w', encoding='utf-8') as f:
+                json.dump(conversion_stamp(args.input_file, args.output, options), f)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -1,9 +1,12 @@
 import json
 import requests
+from requests.adapters import HTTPAdapter
 import time
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from colorama import init, Fore, Style
+from convert_test_format import load_json  # orjson-aware JSON loading shared with the converter
 
 # Initialize colorama for colored terminal output
 init()
@@ -16,11 +19,16 @@ from FINAL.fix_imports import add_project_root_to_path
 API_URL = "http://localhost:5000/api/search"
 HEALTH_URL = "http://localhost:5000/api/health"
 
+# Shared HTTP session so test requests reuse keep-alive connections
+SESSION = requests.Session()
+# Test queries sent to the API at once; the LLM backend serializes generation,
+# so much higher values only make requests queue up against the 60s timeout
+DEFAULT_WORKERS = 4
+
 def load_test_queries(file_path):
     """Load test queries from a JSON file"""
     try:
-        with open(file_path, 'r') as f:
-            return json.load(f)
+        return load_json(file_path)
     except FileNotFoundError:
         print(f"{Fore.RED}Error: Test file {file_path} not found.{Style.RESET_ALL}")
         return []
@@ -31,7 +39,7 @@ def load_test_queries(file_path):
 def check_api_health():
     """Check if the API server is running"""
     try:
-        response = requests.get(HEALTH_URL, timeout=5)
+        response = SESSION.get(HEALTH_URL, timeout=5)
         if response.status_code == 200:
             data = response.json()
             if data.get("status") == "ok":
@@ -47,9 +55,13 @@ def check_api_health():
         print(f"{Fore.RED}✗ API server is not running. Please start it with 'cd FINAL && python api_server.py'.{Style.RESET_ALL}")
         return False
 
-def test_query(query, expected_fund=None, top_k=5):
-    """Test a single query against the API"""
-    print(f"\n{Fore.CYAN}Testing query:{Style.RESET_ALL} {query}")
+def evaluate_query(query, expected_fund=None, top_k=5):
+    """
+    Test a single query against the API without printing, so queries can run concurrently
+    
+    Returns (success, top result matched expected_fund, report text)
+    """
+    lines = [f"\n{Fore.CYAN}Testing query:{Style.RESET_ALL} {query}"]
     
     try:
         payload = {
@@ -59,71 +71,79 @@ def test_query(query, expected_fund=None, top_k=5):
         }
         
         start_time = time.time()
-        response = requests.post(API_URL, json=payload, timeout=60)
+        response = SESSION.post(API_URL, json=payload, timeout=60)
         elapsed_time = time.time() - start_time
         
         if response.status_code != 200:
-            print(f"{Fore.RED}Error: API returned status code {response.status_code}{Style.RESET_ALL}")
-            print(f"Response: {response.text}")
-            return False
+            lines.append(f"{Fore.RED}Error: API returned status code {response.status_code}{Style.RESET_ALL}")
+            lines.append(f"Response: {response.text}")
+            return False, False, "\n".join(lines)
         
         data = response.json()
         
         if not data.get("success", False):
-            print(f"{Fore.RED}Error: API request failed - {data.get('error', 'Unknown error')}{Style.RESET_ALL}")
-            return False
+            lines.append(f"{Fore.RED}Error: API request failed - {data.get('error', 'Unknown error')}{Style.RESET_ALL}")
+            return False, False, "\n".join(lines)
         
         results = data.get("results", [])
         if not results:
-            print(f"{Fore.YELLOW}Warning: No results returned for query.{Style.RESET_ALL}")
-            return False
+            lines.append(f"{Fore.YELLOW}Warning: No results returned for query.{Style.RESET_ALL}")
+            return False, False, "\n".join(lines)
         
         # Display results
         top_fund = results[0] if results else None
+        matched = False
         
         if top_fund:
-            print(f"\n{Fore.GREEN}Top result:{Style.RESET_ALL}")
-            print(f"  Name: {top_fund.get('name', 'N/A')}")
-            print(f"  Category: {top_fund.get('category', 'N/A')}")
-            print(f"  Risk: {top_fund.get('risk', 'N/A')}")
+            lines.append(f"\n{Fore.GREEN}Top result:{Style.RESET_ALL}")
+            lines.append(f"  Name: {top_fund.get('name', 'N/A')}")
+            lines.append(f"  Category: {top_fund.get('category', 'N/A')}")
+            lines.append(f"  Risk: {top_fund.get('risk', 'N/A')}")
             
             if expected_fund:
-                if expected_fund.lower() in top_fund.get('name', '').lower():
-                    print(f"{Fore.GREEN}✓ Expected fund match: {expected_fund}{Style.RESET_ALL}")
+                matched = expected_fund.lower() in top_fund.get('name', '').lower()
+                if matched:
+                    lines.append(f"{Fore.GREEN}✓ Expected fund match: {expected_fund}{Style.RESET_ALL}")
                 else:
-                    print(f"{Fore.RED}✗ Expected fund '{expected_fund}' not matched!{Style.RESET_ALL}")
+                    lines.append(f"{Fore.RED}✗ Expected fund '{expected_fund}' not matched!{Style.RESET_ALL}")
             
             # Print scores if available
             if 'scoreExplanation' in top_fund:
-                print(f"\n{Fore.CYAN}Relevance scores:{Style.RESET_ALL}")
+                lines.append(f"\n{Fore.CYAN}Relevance scores:{Style.RESET_ALL}")
                 scores = top_fund['scoreExplanation']
-                print(f"  Semantic: {scores.get('semantic', 'N/A')}")
-                print(f"  Metadata: {scores.get('metadata', 'N/A')}")
-                print(f"  Fuzzy: {scores.get('fuzzy', 'N/A')}")
-                print(f"  Final: {scores.get('final', 'N/A')}")
+                lines.append(f"  Semantic: {scores.get('semantic', 'N/A')}")
+                lines.append(f"  Metadata: {scores.get('metadata', 'N/A')}")
+                lines.append(f"  Fuzzy: {scores.get('fuzzy', 'N/A')}")
+                lines.append(f"  Final: {scores.get('final', 'N/A')}")
         
         # Print LLM response
         llm_response = data.get("llm_response", "")
         if llm_response:
-            print(f"\n{Fore.CYAN}LLM analysis:{Style.RESET_ALL}")
+            lines.append(f"\n{Fore.CYAN}LLM analysis:{Style.RESET_ALL}")
             # Limit output to 300 characters for readability
-            print(f"  {llm_response[:300]}..." if len(llm_response) > 300 else llm_response)
+            lines.append(f"  {llm_response[:300]}..." if len(llm_response) > 300 else llm_response)
         
-        print(f"\n{Fore.CYAN}Query time:{Style.RESET_ALL} {elapsed_time:.2f} seconds")
-        return True
+        lines.append(f"\n{Fore.CYAN}Query time:{Style.RESET_ALL} {elapsed_time:.2f} seconds")
+        return True, matched, "\n".join(lines)
         
     except requests.exceptions.Timeout:
-        print(f"{Fore.RED}Error: Request timed out after 60 seconds.{Style.RESET_ALL}")
-        return False
+        lines.append(f"{Fore.RED}Error: Request timed out after 60 seconds.{Style.RESET_ALL}")
+        return False, False, "\n".join(lines)
     except requests.exceptions.RequestException as e:
-        print(f"{Fore.RED}Error: {str(e)}{Style.RESET_ALL}")
-        return False
+        lines.append(f"{Fore.RED}Error: {str(e)}{Style.RESET_ALL}")
+        return False, False, "\n".join(lines)
     except Exception as e:
-        print(f"{Fore.RED}Unexpected error: {str(e)}{Style.RESET_ALL}")
-        return False
+        lines.append(f"{Fore.RED}Unexpected error: {str(e)}{Style.RESET_ALL}")
+        return False, False, "\n".join(lines)
+
+def test_query(query, expected_fund=None, top_k=5):
+    """Test a single query against the API; returns (success, top result matched expected_fund)"""
+    success, matched, report = evaluate_query(query, expected_fund, top_k)
+    print(report)
+    return success, matched
 
-def run_tests_from_file(file_path, top_k=5):
-    """Run all tests from a JSON file"""
+def run_tests_from_file(file_path, top_k=5, workers=DEFAULT_WORKERS):
+    """Run all tests from a JSON file, sending up to `workers` queries concurrently"""
     test_cases = load_test_queries(file_path)
     if not test_cases:
         return
@@ -135,40 +155,46 @@ def run_tests_from_file(file_path, top_k=5):
     matches = 0
     total = len(test_cases)
     
-    for i, test_case in enumerate(test_cases, 1):
-        print(f"\n{Fore.CYAN}Test {i}/{total}{Style.RESET_ALL}")
+    # requests keeps at most 10 idle connections per host by default; size the
+    # pool to the worker count so extra workers don't reconnect on every query
+    SESSION.mount("http://", HTTPAdapter(pool_maxsize=max(workers, 10)))
+    
+    def run_case(test_case):
         query = test_case.get("query", "")
-        expected_fund = test_case.get("expected_fund")
-        
         if not query:
-            print(f"{Fore.YELLOW}Warning: Empty query in test case #{i}, skipping.{Style.RESET_ALL}")
-            continue
-        
-        success = test_query(query, expected_fund, top_k)
-        if success:
-            successes += 1
-        
-        # If expected fund was provided and top result matches, count as a match
-        if expected_fund and success and any(expected_fund.lower() in result.get('name', '').lower() 
-                                           for result in requests.post(API_URL, 
-                                                                      json={"query": query, "top_k": top_k}).json().get("results", [])[:1]):
-            matches += 1
-        
-        # Add a separator between tests
-        print("\n" + "-" * 80)
-        
-        # Optional: add a slight delay between tests to avoid overwhelming the API
-        if i < total:
-            time.sleep(1)
+            return None
+        return evaluate_query(query, test_case.get("expected_fund"), top_k)
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # map yields in test order, so reports print in order as they complete
+        for i, outcome in enumerate(executor.map(run_case, test_cases), 1):
+            print(f"\n{Fore.CYAN}Test {i}/{total}{Style.RESET_ALL}")
+            
+            if outcome is None:
+                print(f"{Fore.YELLOW}Warning: Empty query in test case #{i}, skipping.{Style.RESET_ALL}")
+                continue
+            
+            success, matched, report = outcome
+            print(report)
+            if success:
+                successes += 1
+            
+            # If expected fund was provided and top result matches, count as a match
+            if matched:
+                matches += 1
+            
+            # Add a separator between tests
+            print("\n" + "-" * 80)
     
     # Print summary
     print(f"\n{Fore.CYAN}Test Summary:{Style.RESET_ALL}")
     print(f"  Total tests: {total}")
     print(f"  Successful API calls: {successes}/{total} ({successes/total*100:.0f}%)")
     
-    if any(test.get("expected_fund") for test in test_cases):
-        print(f"  Expected fund matches: {matches}/{sum(1 for test in test_cases if test.get('expected_fund'))} "
-              f"({matches/sum(1 for test in test_cases if test.get('expected_fund'))*100:.0f}%)")
+    expected_total = sum(1 for test in test_cases if test.get("expected_fund"))
+    if expected_total:
+        print(f"  Expected fund matches: {matches}/{expected_total} "
+              f"({matches/expected_total*100:.0f}%)")
 
 def run_manual_tests(top_k=5):
     """Run tests from manual input"""
@@ -203,7 +229,8 @@ def main():
     if len(sys.argv) > 1:
         file_path = sys.argv[1]
         top_k = int(sys.argv[2]) if len(sys.argv) > 2 else 5
-        run_tests_from_file(file_path, top_k)
+        workers = int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_WORKERS
+        run_tests_from_file(file_path, top_k, workers)
     else:
         # No file provided, try default location or offer manual testing
         default_file = os.path.join(os.path.dirname(__file__), 'test_queries.json')